@@ -1,19 +1,35 @@
+import time
+_script_start = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import PyPDF2
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import util
 # Import custom helper functions to keep the main code clean
-from function import init_state, clear_cv, clean_text, load_model
+from function import (init_state, clear_cv, clean_text, load_embedding_store, load_embedding_service,
+                      load_resume_index, load_session_manager, put_artifact, get_artifact, start_model_warm_up)
+from service import ServiceOverloaded
+from extraction import read_pdf_cached, iter_pdf_pages, ExtractionError, ENCRYPTED, CORRUPT, EMPTY, TIMEOUT
+from batch import extract_batch, rank_resumes
+from scoring import analyze_keywords, chunked_similarity, DEFAULT_CHUNK_SIZE, DEFAULT_STRIDE
+from streaming import stream_score
+from encoder import is_loaded
+from skills import cv_index
+from startup import record, report
+import metrics
+
+# Heavy libraries (torch, sentence_transformers, scikit-learn, PyPDF2, nltk) are NOT imported
+# here; each is loaded on first use, so the first page renders without waiting for them.
+record("app imports", time.perf_counter() - _script_start)
 
 # --- INITIALIZATION ---
 # Initialize session state variables (like 'cv_text' and 'info') to prevent KeyErrors on startup
 init_state()
 
-# Load the SBERT model. This function is cached (@st.cache_resource) so the model 
-# only loads once, ensuring the app runs fast after the first launch.
-model = load_model()
+# The SBERT model is loaded lazily: only the first Flexible/Chunked/Batch request pays for it
+# (via load_embedding_service(), cached with @st.cache_resource). Strict-only users never load it.
+# Optionally (RESUME_SCANNER_WARMUP=1), it starts loading in the background right away.
+start_model_warm_up()
+# Periodic Prometheus/JSONL export (only with RESUME_SCANNER_METRICS=1 and RESUME_SCANNER_METRICS_FILE set)
+metrics.start_exporter()
 
 # --- PAGE CONFIGURATION ---
 # Set up the browser tab properties and layout
@@ -52,6 +68,16 @@ with st.sidebar:
 
     st.divider()
 
+    # --- WORKSPACE SWITCH ---
+    # Batch mode ranks many resumes against one Job Description in a single pass
+    batch_mode = st.toggle(
+        "📦 Batch Screening Mode",
+        value=False,
+        help="Upload many PDFs (or a ZIP/folder) and rank every candidate against one Job Description."
+    )
+
+    st.divider()
+
     # --- HELP & DOCUMENTATION ---
     st.header("ℹ️ Help Center")
     st.caption("Guide & Documentation")
@@ -97,7 +123,7 @@ with st.sidebar:
         * **A:** The system calculates the "Term Frequency" (TF-IDF) of the Job Description. Words that appear frequently (and are unique to the job) are ranked as "High Priority." You should prioritize adding these to your resume first.
 
         **Q: Is my data safe?**  
-        * **A:** Yes. Your resume and the job description are processed in temporary memory and are **not saved** to any database.
+        * **A:** Yes. Your resume and the job description are processed in temporary memory and are **not saved** to disk or any database. Your data is released when you clear it or after 30 minutes of inactivity. The only exception are Batch Mode resumes you explicitly add to the search pool: they stay on the server (until the pool is full) and can be found by other users. (Disk caching is disabled unless the server operator explicitly enables it.)
         """)
 
     st.markdown("---") 
@@ -113,6 +139,223 @@ with st.sidebar:
         unsafe_allow_html=True
     )
 
+    # --- STARTUP REPORT ---
+    # Time from the first script run to a rendered sidebar ("time-to-first-page")
+    record("first page render", time.perf_counter() - _script_start)
+    with st.expander("⏱️ Startup Report"):
+        st.caption("Where cold-start time went in this server process (first occurrence of each phase).")
+        st.dataframe(
+            pd.DataFrame(report(), columns=["Phase", "Seconds"]),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"🧠 AI model: {'loaded' if is_loaded() else 'not loaded yet (loads on first Flexible request)'}")
+
+    # --- PERFORMANCE PANEL ---
+    # Only with RESUME_SCANNER_METRICS=1; timings accumulate over every rerun of this server process
+    if metrics.ENABLED:
+        with st.expander("📈 Performance"):
+            snapshot = metrics.snapshot()
+            st.caption("Stage timings across all sessions of this server process (up to the previous rerun).")
+            st.dataframe(
+                pd.DataFrame(
+                    [(stage, t["count"], t["mean_ms"], t["max_s"] * 1000, t["total_s"])
+                     for stage, t in sorted(snapshot["timings"].items())],
+                    columns=["Stage", "Calls", "Mean (ms)", "Max (ms)", "Total (s)"]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+            # Cache hit/miss counters and memory gauges (bytes shown in MB)
+            st.dataframe(
+                pd.DataFrame(
+                    [(name, value) for name, value in sorted(snapshot["counters"].items())]
+                    + [(name.replace("_bytes", " (MB)"), round(value / 2**20, 1) if name.endswith("_bytes") else value)
+                       for name, value in sorted(snapshot["gauges"].items()) if value is not None],
+                    columns=["Metric", "Value"]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    # --- MEMORY REPORT ---
+    # Large per-session values live in one shared store; sessions idle past the TTL release theirs
+    with st.expander("🧠 Memory"):
+        memory = load_session_manager().report()
+        # Only once the resume index is open (reading its stats never loads the model)
+        pool = metrics.collect("resume_index") or {"resumes": 0, "memory_bytes": 0}
+        st.caption("Shared by every session of this server process.")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    ("Active sessions", memory["active_sessions"]),
+                    ("Expired sessions", memory["expired_sessions"]),
+                    ("Shared artifacts", memory["artifact_items"]),
+                    ("Artifact store (MB)", round(memory["artifact_bytes"] / 2**20, 1)),
+                    ("Held by sessions (MB)", round(memory["referenced_bytes"] / 2**20, 1)),
+                    ("Evicted artifacts", memory["artifact_evictions"]),
+                    ("Resumes in search pool", pool["resumes"]),
+                    ("Search pool (MB)", round(pool["memory_bytes"] / 2**20, 1)),
+                    ("Process RSS (MB)", round(memory["process_rss_bytes"] / 2**20, 1) if memory["process_rss_bytes"] else None),
+                ],
+                columns=["Metric", "Value"]
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+
+# --- BATCH SCREENING MODE ---
+# Recruiters can rank hundreds of applicants at once instead of uploading one file per rerun.
+if batch_mode:
+    st.subheader("📦 Batch Screening")
+    col_files, col_batch_description = st.columns(2)
+
+    with col_files:
+        # Let the user choose between picking individual files/ZIPs or a whole folder
+        source = st.radio(
+            "Source",
+            ["Files / ZIP", "Folder"],
+            horizontal=True,
+            label_visibility="collapsed"
+        )
+        uploaded_batch = st.file_uploader(
+            label="📂 Upload Resumes (PDF or ZIP)",
+            type=["pdf", "zip"],
+            accept_multiple_files=True if source == "Files / ZIP" else "directory",
+            help="Select multiple PDFs, a ZIP archive of PDFs, or a folder containing PDFs."
+        )
+
+    with col_batch_description:
+        batch_description = st.text_area(
+            label="📋 Job Description",
+            height=250,
+            placeholder="Paste the full job description here...",
+        )
+
+    # Opt-in: otherwise the uploaded resumes are released with the session like any other upload
+    add_to_pool = st.toggle(
+        "Add these resumes to the search pool",
+        help="Keep the ranked resumes (text and file name) on this server, so anyone using it can find them with "
+             "🔎 Search Scanned Resumes. The oldest are removed once the pool is full.",
+    )
+
+    run_batch = st.button(
+        label="🏁 Rank Candidates",
+        disabled=not (uploaded_batch and batch_description.strip()),
+        use_container_width=True,
+    )
+
+    st.divider()
+
+    if run_batch:
+        try:
+            # 1. EXTRACT: Read every PDF (expanding ZIP archives) and clean the text
+            with st.spinner("📄 Extracting resumes..."):
+                resumes, failures = extract_batch(uploaded_batch)
+
+            if not resumes:
+                st.warning("⚠️ None of the uploaded files contained readable PDF text.")
+            else:
+                # 2. SCORE: One TF-IDF fit and batched SBERT encoding for the whole pool
+                with st.spinner(f"🧠 Scoring {len(resumes)} resumes..."):
+                    # Already one batched call: it bypasses the interactive service (and its deadlines)
+                    embedder = load_embedding_store()
+                    # The table can be large: the session only keeps a handle to it (see sessions.py)
+                    put_artifact("batch_ranking", rank_resumes(resumes, clean_text(batch_description), embedder))
+                    # Remember the pool for later searches (the vectors come straight from the embedding cache)
+                    if add_to_pool:
+                        load_resume_index().add_texts([text for _, text, _ in resumes], embedder,
+                                                      names=[name for name, _, _ in resumes])
+
+            # Report unreadable files without aborting the whole batch
+            if failures:
+                with st.expander(f"⚠️ {len(failures)} file(s) could not be processed"):
+                    st.dataframe(
+                        pd.DataFrame(failures, columns=["Resume", "Category", "Reason"]),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+        except Exception as e:
+            error_msg = str(e).lower()
+
+            # Handle the common TF-IDF failure when the JD has no usable keywords
+            if "empty vocabulary" in error_msg or "stop words" in error_msg:
+                st.error("⚠️ **Insufficient Content (TF-IDF):**\n\nThe Job Description is too short or contains only common filler words. Please paste a more detailed Job Description.")
+            else:
+                st.error(f"❌ **Batch Error:**\n\nAn unexpected error occurred while ranking the resumes.\n\n**Technical Details:** `{str(e)}`")
+
+    # 3. DISPLAY: The ranking survives reruns, so sorting the table does not re-score anything
+    batch_ranking = get_artifact("batch_ranking")
+    if batch_ranking is not None:
+        st.markdown(f"### 🏆 Candidate Ranking ({len(batch_ranking)} resumes)")
+        st.caption("Click a column header to sort by Strict or Flexible score.")
+        st.dataframe(
+            batch_ranking,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Strict Score": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.3f"),
+                "Flexible Score": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.3f"),
+            }
+        )
+        st.download_button(
+            "⬇️ Download Ranking (CSV)",
+            data=batch_ranking.to_csv(index=False),
+            file_name="candidate_ranking.csv",
+            mime="text/csv"
+        )
+
+    # 4. SEARCH THE POOL: The reverse query, against every resume ranked so far (not only this upload)
+    st.divider()
+    st.markdown("### 🔎 Search Scanned Resumes")
+    st.caption("Find the best matches for the Job Description above among every resume added to the search pool on this server.")
+    col_results, col_rerank = st.columns(2)
+    n_results = col_results.number_input("Results", min_value=1, max_value=100, value=10)
+    rerank = col_rerank.toggle(
+        "Re-rank with Strict Score",
+        help="Re-score the closest candidates with the TF-IDF keyword score and rank them by the average of both scores."
+    )
+
+    if st.button("🔎 Search Pool", disabled=not batch_description.strip(), use_container_width=True):
+        try:
+            with st.spinner("🔎 Searching the resume index..."):
+                matches = load_resume_index().search(clean_text(batch_description), load_embedding_store(),
+                                                     k=int(n_results), rerank=rerank)
+            put_artifact("pool_matches", pd.DataFrame({
+                "Rank": range(1, len(matches) + 1),
+                "Resume": [match.name for match in matches],
+                "Match Score": [match.score for match in matches],
+                "Flexible Score": [match.flexible for match in matches],
+                "Strict Score": [match.strict for match in matches],
+            }))
+        except Exception as e:
+            error_msg = str(e).lower()
+
+            # Handle the common TF-IDF failure when the JD has no usable keywords
+            if "empty vocabulary" in error_msg or "stop words" in error_msg:
+                st.error("⚠️ **Insufficient Content (TF-IDF):**\n\nThe Job Description is too short or contains only common filler words. Please paste a more detailed Job Description.")
+            else:
+                st.error(f"❌ **Search Error:**\n\nAn unexpected error occurred while searching the resume index.\n\n**Technical Details:** `{str(e)}`")
+
+    pool_matches = get_artifact("pool_matches")
+    if pool_matches is not None:
+        if pool_matches.empty:
+            st.info("ℹ️ The resume index is empty. Rank a batch of resumes with **Add these resumes to the search pool** enabled first.")
+        else:
+            st.dataframe(
+                pool_matches,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    column: st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.3f")
+                    for column in ("Match Score", "Flexible Score", "Strict Score")
+                }
+            )
+
+    # The single-resume workflow below is not rendered in batch mode
+    st.stop()
+
 # --- UI LAYOUT CONFIGURATION ---
 # Create a balanced two-column layout to separate inputs side-by-side.
 # This ensures the Resume and Job Description are visible simultaneously.
@@ -143,12 +386,25 @@ with col_cv:
     # Dropdown to select the analysis algorithm (Statistical vs. Semantic)
     mode = st.selectbox(
         "Mode",
-        ["Strict", "Flexible"],
+        ["Strict", "Flexible", "Chunked", "Streaming"],
         index=0,
-        help="Select 'Strict' for keyword matching or 'Flexible' for context matching.",
+        help="Select 'Strict' for keyword matching, 'Flexible' for context matching, 'Chunked' for context matching across the full length of long documents, or 'Streaming' to score long documents page by page as they are read.",
         label_visibility="collapsed"      # Hides the label for a cleaner UI look
     )
 
+    # Chunked/Streaming Mode settings: window size (words per chunk) and stride (words between chunk starts)
+    if mode.lower() in ("chunked", "streaming"):
+        col_chunk, col_stride = st.columns(2)
+        chunk_size = col_chunk.number_input(
+            "Chunk size (words)", min_value=20, max_value=200, value=DEFAULT_CHUNK_SIZE, step=10,
+            help="Words per chunk. Keep it under ~100 so each chunk fits the model's 128-token limit."
+        )
+        # The stride cannot exceed the chunk size, or the words between two chunks would be skipped
+        stride = col_stride.number_input(
+            "Stride (words)", min_value=10, max_value=int(chunk_size), value=min(DEFAULT_STRIDE, int(chunk_size)), step=10,
+            help="Words between the start of two chunks (at most the chunk size). A stride smaller than the chunk size creates overlap."
+        )
+
     # Primary Action Button
     process = st.button(
         label="🔍 Analyze Match",
@@ -172,12 +428,42 @@ if uploaded_cv and job_description:
     # 2. CORE PROCESSING: Execute only if the 'Analyze' button is clicked AND data is not yet cached
     if process and not st.session_state.info and not st.session_state.cv_text:
         try:
-            # Attempt to read and parse the uploaded PDF file
-            reader = PyPDF2.PdfReader(uploaded_cv)
-            all_pages = reader.pages
+            if mode.lower() == "streaming":
+                # Streaming Mode reads, cleans and scores the PDF one page at a time, so the first
+                # score is shown after page 1 instead of after the whole document.
+                # Clicking 'Stop' reruns the script, which interrupts the loop between two pages.
+                # Session state only keeps the running scores (no page text), see step 2a below.
+                st.button("⏹️ Stop Analysis", help="Stop reading the resume and keep the pages analyzed so far.")
+                progress_bar = st.progress(0.0, text="📄 Reading page 1...")
+                score_slot = st.empty()
+                chart_slot = st.empty()
+
+                st.session_state.stream = stream = {"relevance": [], "total": 0,
+                                                    "score": 0.0, "coverage": 0.0, "done": False}
+                # The JD is cleaned like in every other mode, so Streaming and Chunked agree on the same input
+                for page in stream_score(uploaded_cv.getvalue(), clean_text(job_description), load_embedding_service(),
+                                         chunk_size=int(chunk_size), stride=int(stride)):
+                    stream["relevance"].append(page.relevance)
+                    stream["total"] = page.total_pages
+                    stream["score"] = page.running_score
+                    stream["coverage"] = page.coverage
+
+                    analyzed = len(stream["relevance"])
+                    progress_bar.progress(analyzed / page.total_pages, text=f"📄 Analyzed page {analyzed} of {page.total_pages}")
+                    score_slot.metric("AI Requirement Match (So Far)", value=round(page.running_score, 4))
+                    chart_slot.bar_chart(pd.DataFrame({"Page Relevance": stream["relevance"]},
+                                                      index=range(1, analyzed + 1)))
+
+                stream["done"] = True
+                progress_bar.empty()
+                # The fully read document is now in the extraction cache
+                cv_text, total_pages = read_pdf_cached(uploaded_cv.getvalue())
+            else:
+                # Attempt to read and parse the uploaded PDF file.
+                # Extraction is cached by the hash of the file bytes, so re-uploading an identical
+                # resume (in this or any other session) reuses the stored text and page count.
+                cv_text, total_pages = read_pdf_cached(uploaded_cv.getvalue())
 
-            total_pages = len(all_pages)
-            
             # Check if PDF content exists
             if total_pages > 0:
                 if total_pages > 1:
@@ -188,32 +474,38 @@ if uploaded_cv and job_description:
                     # Affirmation: Confirms that the length meets industry standards
                     st.session_state.info = f"✅ **Optimal Length:** Single-page resume detected. This concise format is highly preferred by recruiters and ATS for quick scanning."
 
-                # Extraction Loop: Iterate through all pages and append text to session state
-                for page in all_pages:
-                    st.session_state.cv_text += page.extract_text() + "\n\n"
+                # Store the extracted text (all pages), cleaned once, in the shared artifact store.
+                # Session state only keeps its handle; identical resumes share one copy across sessions.
+                cv_text = clean_text(cv_text)
+                if cv_text:
+                    put_artifact("cv_text", cv_text)
             else:
                 # Handle cases where PDF is valid but empty
                 st.warning("⚠️ Error: The uploaded PDF appears to be empty or unreadable.")
                 st.stop()
                 
-        except Exception as e:
-            # Graceful Error Handling: Catch unexpected errors (e.g., encrypted files)
-            error_msg = str(e).lower()
+        except ExtractionError as e:
+            # Graceful Error Handling: The extraction engine classifies every failure,
+            # so the message is chosen by category instead of by matching error text.
             answer = "" # Placeholder for the error message
 
             # 1. Handle Password Protected / Encrypted PDFs
-            if "password" in error_msg or "encrypted" in error_msg:
+            if e.category == ENCRYPTED:
                 answer = "🔒 **Encrypted PDF Detected**\n\nThis file is password protected. Please upload an **unlocked (decrypted)** version of your resume so the system can read it."
 
             # 2. Handle Corrupt Files or Invalid Formats (e.g., renaming .docx to .pdf manually)
-            elif "pdf marker" in error_msg or "eof" in error_msg or "startxref" in error_msg:
+            elif e.category == CORRUPT:
                 answer = "❌ **Invalid or Corrupt File**\n\nThe file appears to be corrupted or is not a valid PDF format. \n\n*Tip: If you renamed a Word file (.docx) to .pdf, please open it in Word and choose 'Save as PDF' instead.*"
 
-            # 3. Handle Empty Files (Zero bytes)
-            elif "empty" in error_msg or "no data" in error_msg:
+            # 3. Handle Empty Files (Zero bytes or no pages)
+            elif e.category == EMPTY:
                 answer = "⚠️ **Empty File**\n\nThe uploaded file appears to contain no data. Please check the file and try again."
 
-            # 4. Handle General/Unknown Errors
+            # 4. Handle Oversized/Pathological Files that exceed the extraction time budget
+            elif e.category == TIMEOUT:
+                answer = "⏱️ **Processing Timeout**\n\nReading this PDF took too long and was stopped. Please upload a smaller or simpler version of your resume (e.g., exported directly from Word or Google Docs)."
+
+            # 5. Handle General/Unknown Errors
             else:
                 answer = f"⚠️ **Processing Error**\n\nAn unexpected error occurred while reading the PDF.\n\n**Technical Details:** `{str(e)}`"
 
@@ -221,6 +513,48 @@ if uploaded_cv and job_description:
             st.error(answer)
             st.stop()
 
+        except (ServiceOverloaded, TimeoutError):
+            # Streaming Mode embeds every page through the shared embedding service
+            st.session_state.stream = None
+            st.error("🚦 **Server Busy:**\n\nMany analyses are running right now, so this request could not be processed in time. Please wait a few seconds and try again.")
+            st.stop()
+
+        except Exception as e:
+            # Streaming Mode loads and runs the AI model here (the other modes do it further below)
+            st.session_state.stream = None
+            error_msg = str(e).lower()
+
+            # 1. Handle Memory/Resource Issues (AI Model Error)
+            if "cuda" in error_msg or "memory" in error_msg or "out of memory" in error_msg:
+                answer = "💾 **System Limit Reached:**\n\nThe AI model encountered a memory limit while processing the pages. Please try a larger stride or refresh the page."
+
+            # 2. Handle General/Unknown Errors
+            else:
+                answer = f"❌ **Analysis Error:**\n\nAn unexpected error occurred during the {mode} Mode analysis.\n\n**Technical Details:** `{str(e)}`"
+
+            st.error(answer)
+            st.stop()
+
+    # 2a. STREAMING STOPPED EARLY: The 'Stop' button interrupted the page loop on the previous run.
+    # The pages analyzed until then become the resume text, so every other section still works.
+    elif st.session_state.stream and not st.session_state.stream["done"] and not st.session_state.cv_text:
+        stream = st.session_state.stream
+        analyzed = len(stream["relevance"])
+        if analyzed:
+            # Only the scores were kept: read those pages again (worker pool, same time budget)
+            try:
+                pages = iter_pdf_pages(uploaded_cv.getvalue(), max_pages=analyzed)
+                put_artifact("cv_text", clean_text("\n\n".join(text for _, text, _ in pages)))
+                st.session_state.info = f"⏹️ **Stopped Early:** Analyzed {analyzed} of {stream['total']} pages. The results below only cover these pages."
+            except ExtractionError:
+                st.session_state.stream = None
+                st.error("⚠️ **Processing Error**\n\nThe pages analyzed so far could not be read again. Please run the analysis again.")
+                st.stop()
+        else:
+            # Stopped before the first page finished: back to the ready state
+            st.session_state.stream = None
+            st.warning("⚠️ Ready to analyze. Please click the '🔍 Analyze Match' button to start.")
+
     # 3. CACHING STRATEGY: Handle repeated clicks on the same file
     elif process and st.session_state.info and st.session_state.cv_text:
         # Message: Informs the user that the analysis is already done/loaded
@@ -257,38 +591,34 @@ elif uploaded_cv or job_description:
 # i apply it here as a safety measure (precaution).
 # This ensures that both the Resume and Job Description are standardized into a clean, 
 # single-line format to maximize the accuracy of the AI and TF-IDF models.
-if st.session_state.cv_text and job_description:
-    st.session_state.cv_text = clean_text(st.session_state.cv_text)
+# The CV text was cleaned once when it was stored; here it is only read back through its handle.
+cv_text = get_artifact("cv_text") or ""
+if cv_text and job_description:
     job_description = clean_text(job_description)
 
 # --- LOGIC: STRICT MODE (TF-IDF ANALYSIS) ---
 # Executes when both inputs are present AND 'Strict' mode is selected
-if st.session_state.cv_text and job_description \
+if cv_text and job_description \
     and st.session_state.info and mode.lower() == "strict":
 
     try:
-        # 1. INITIALIZE VECTORIZER
-        # Use TF-IDF with English stop words to remove common filler words (e.g., "the", "and")
-        vectorizer = TfidfVectorizer(stop_words='english')
-        
-        # 2. FIT & TRANSFORM
-        # Fit to JD to establish the vocabulary "Ground Truth"
-        desc_vectors = vectorizer.fit_transform([job_description])
-        # Transform CV based ONLY on the JD's vocabulary
-        cv_vectors = vectorizer.transform([st.session_state.cv_text])
+        # 1. TF-IDF ANALYSIS (MEMOIZED)
+        # Fit to JD to establish the vocabulary "Ground Truth", transform the CV with it,
+        # and compute the Cosine Similarity. The result is cached per (CV, JD) pair and
+        # shared with the keyword panels below, so reruns do not refit the vectorizer.
+        analysis = analyze_keywords(cv_text, job_description)
 
         # Display file processing info if available
         if st.session_state.info:
             st.info(st.session_state.info)
 
-        # 3. CALCULATE MATCH SCORE
-        # Compute Cosine Similarity between the CV vector and JD vector
-        similarity_scores = cosine_similarity(cv_vectors, desc_vectors)[0][0]
+        # 2. MATCH SCORE
+        similarity_scores = analysis.score
         
         # Display the result
         st.metric("ATS Match Score (TF-IDF)", value = similarity_scores)
 
-        # 4. PASS/FAIL THRESHOLD LOGIC
+        # 3. PASS/FAIL THRESHOLD LOGIC
         if similarity_scores > 0.5:
             st.success("✅ **ATS Optimized:** High keyword matching detected.")
         else:
@@ -317,27 +647,33 @@ if st.session_state.cv_text and job_description \
 
 # --- LOGIC: FLEXIBLE MODE (AI + HYBRID ANALYSIS) ---
 # Executes when inputs are present AND 'Flexibel' (Smart Mode) is selected
-elif st.session_state.cv_text and job_description \
+elif cv_text and job_description \
     and st.session_state.info and mode.lower() == "flexible":
 
     try:
         # 1. SEMANTIC EMBEDDING (AI ENGINE)
         # Convert text into vector embeddings to understand context/meaning
-        desc_embeds = model.encode(job_description)
-        cv_embeds = model.encode(st.session_state.cv_text)
+        # Vectors come from the embedding cache; the model only runs for unseen texts, batched
+        # together with other sessions' requests. The model is loaded here on first use (lazy loading).
+        embedder = load_embedding_service()
+        desc_embeds, cv_embeds = embedder.encode([job_description, cv_text], normalize_embeddings=True)
 
         # Display file processing info if available
         if st.session_state.info:
             st.info(st.session_state.info)
 
         # 2. CALCULATE CONTEXTUAL SIMILARITY
-        # Use Cosine Similarity on the AI embeddings
-        # .item() converts the tensor result into a standard Python float
-        similarity_scores = util.cos_sim(cv_embeds, desc_embeds).item()
+        # Use Cosine Similarity on the AI embeddings (a dot product, since both are normalized)
+        # float() converts the numpy result into a standard Python float
+        similarity_scores = float(cv_embeds @ desc_embeds)
         
         # Display the AI Score
         st.metric("AI Relevance Score (Context)", value = similarity_scores)
 
+        # Show how often the embedding cache spared a model forward pass
+        cache_stats = embedder.stats()
+        st.caption(f"🗄️ Embedding cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits / {cache_stats['misses']} misses")
+
         # 3. INTERPRET SCORE
         if similarity_scores > 0.5:
             st.success("✅ **Strong Match:** The CV is contextually relevant to the job.")
@@ -358,46 +694,131 @@ elif st.session_state.cv_text and job_description \
         elif "cuda" in error_msg or "memory" in error_msg or "out of memory" in error_msg:
             answer = "💾 **System Limit Reached:**\n\nThe AI model encountered a memory limit while processing the text. Please try shortening the Job Description or refreshing the page."
 
-        # 3. Handle Data/Shape Mismatch (Pandas/Vector Error)
+        # 3. Handle Server Load (Embedding Service Backpressure / Deadline)
+        # Many recruiters are scoring at once: the request queue is full or the request waited too long.
+        elif isinstance(e, (ServiceOverloaded, TimeoutError)):
+            answer = "🚦 **Server Busy:**\n\nMany analyses are running right now, so this request could not be processed in time. Please wait a few seconds and try again."
+
+        # 4. Handle Data/Shape Mismatch (Pandas/Vector Error)
         # Rare, but happens if vectors don't align during dataframe creation.
         elif "dimension" in error_msg or "shape" in error_msg or "length" in error_msg:
             answer = "📐 **Data Mismatch:**\n\nAn error occurred while matching the CV keywords with the Job Description. Please check if the inputs contain valid text."
 
-        # 4. Handle General/Unknown Errors
+        # 5. Handle General/Unknown Errors
         else:
             answer = f"❌ **Analysis Error:**\n\nAn unexpected error occurred during the Flexible Mode analysis.\n\n**Technical Details:** `{str(e)}`"
 
         # Display the specific error message to the user
         st.error(answer)
 
-if st.session_state.cv_text and job_description \
+# --- LOGIC: CHUNKED MODE (FULL-LENGTH AI ANALYSIS) ---
+# Flexible Mode only "sees" the first ~128 tokens of each text because the model truncates its input.
+# Chunked Mode splits both documents into overlapping windows so every page of the CV is scored.
+elif cv_text and job_description \
+    and st.session_state.info and mode.lower() == "chunked":
+
+    try:
+        # 1. CHUNK, EMBED (ONE BATCHED CALL) & AGGREGATE
+        result = chunked_similarity(load_embedding_service(), cv_text, job_description,
+                                    chunk_size=int(chunk_size), stride=int(stride))
+
+        # Display file processing info if available
+        if st.session_state.info:
+            st.info(st.session_state.info)
+
+        # 2. DISPLAY SCORES
+        # The headline score is the average best match of each JD requirement chunk
+        similarity_scores = result["requirement_match"]
+        col_main, col_topk, col_pooled, col_coverage = st.columns(4)
+        col_main.metric("AI Requirement Match (Full Length)", value=round(similarity_scores, 4))
+        col_topk.metric("Top-k Evidence", value=round(result["top_k_match"], 4))
+        col_pooled.metric("Mean-Pooled Similarity", value=round(result["mean_pooled"], 4))
+        col_coverage.metric("Requirement Coverage", value=f"{result['coverage']:.0%}")
+        st.caption(f"Compared {len(result['jd_chunks'])} Job Description chunk(s) against {result['cv_chunks']} CV chunk(s).")
+
+        # 3. INTERPRET SCORE
+        if similarity_scores > 0.5:
+            st.success("✅ **Strong Match:** The CV is contextually relevant to the job across its full length.")
+        else:
+            st.error("⚠️ **Low Relevance:** The CV content does not strongly align with the job context.")
+
+        # 4. PER-REQUIREMENT BREAKDOWN: Which parts of the JD are weakly covered by the CV
+        with st.expander("📊 View Per-Requirement Breakdown"):
+            st.dataframe(
+                pd.DataFrame({
+                    "Job Description Chunk": result["jd_chunks"],
+                    "Best CV Match": result["per_requirement"],
+                }).sort_values(by="Best CV Match"),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    except Exception as e:
+        error_msg = str(e).lower()
+
+        # 1. Handle Memory/Resource Issues (AI Model Error)
+        if "cuda" in error_msg or "memory" in error_msg or "out of memory" in error_msg:
+            answer = "💾 **System Limit Reached:**\n\nThe AI model encountered a memory limit while processing the chunks. Please try a larger stride or refresh the page."
+
+        # 2. Handle Server Load (Embedding Service Backpressure / Deadline)
+        # Many recruiters are scoring at once: the request queue is full or the request waited too long.
+        elif isinstance(e, (ServiceOverloaded, TimeoutError)):
+            answer = "🚦 **Server Busy:**\n\nMany analyses are running right now, so this request could not be processed in time. Please wait a few seconds and try again."
+
+        # 3. Handle General/Unknown Errors
+        else:
+            answer = f"❌ **Analysis Error:**\n\nAn unexpected error occurred during the Chunked Mode analysis.\n\n**Technical Details:** `{str(e)}`"
+
+        # Display the specific error message to the user
+        st.error(answer)
+
+# --- LOGIC: STREAMING MODE (PAGE-BY-PAGE AI ANALYSIS) ---
+# The scores were computed while the PDF was read (see Core Processing); this section only displays them.
+elif cv_text and job_description \
+    and st.session_state.info and mode.lower() == "streaming":
+
+    stream = st.session_state.stream
+    if not stream or not stream["relevance"]:
+        # The resume was processed in another mode, so no per-page scores were recorded
+        st.warning("⚠️ **No Page-by-Page Results:**\n\nThis resume was analyzed in another mode. Re-upload it with 'Streaming' selected to score it page by page.")
+    else:
+        # Display file processing info if available
+        st.info(st.session_state.info)
+
+        # 1. DISPLAY SCORES: Same requirement match as Chunked Mode, accumulated page by page
+        similarity_scores = stream["score"]
+        col_main, col_coverage, col_pages = st.columns(3)
+        col_main.metric("AI Requirement Match (Page by Page)", value=round(similarity_scores, 4))
+        col_coverage.metric("Requirement Coverage", value=f"{stream['coverage']:.0%}")
+        col_pages.metric("Pages Analyzed", value=f"{len(stream['relevance'])} / {stream['total']}")
+
+        # 2. INTERPRET SCORE
+        if similarity_scores > 0.5:
+            st.success("✅ **Strong Match:** The CV is contextually relevant to the job across the pages analyzed.")
+        else:
+            st.error("⚠️ **Low Relevance:** The CV content does not strongly align with the job context.")
+
+        # 3. PER-PAGE BREAKDOWN: Where in the document the relevant experience is
+        st.caption("Relevance of each page on its own (average best match of the Job Description requirements within that page).")
+        st.bar_chart(pd.DataFrame({"Page Relevance": stream["relevance"]},
+                                  index=range(1, len(stream["relevance"]) + 1)))
+
+if cv_text and job_description \
     and st.session_state.info:
 
     # 1. HYBRID ANALYSIS (TF-IDF FOR KEYWORDS)
     # We run TF-IDF to find specific missing keywords.
     # This acts as a "spell checker" for ATS optimization.
-    vectorizer = TfidfVectorizer(stop_words='english')
-    jd_vectors = vectorizer.fit_transform([job_description])
-    cv_vectors = vectorizer.transform([st.session_state.cv_text])
-
-    # Extract features (words) and their calculated importance scores
-    desc_keywords = vectorizer.get_feature_names_out()
-    jd_array = jd_vectors.toarray()[0]
-    cv_array = cv_vectors.toarray()[0]
-
-    # Create a DataFrame to compare JD importance vs CV presence
-    df_jd = pd.DataFrame({
-        "Keywords": desc_keywords,
-        "jd_score": jd_array,  # How important the word is in the Job Desc
-        "cv_score": cv_array   # Whether the word exists in the CV (0 = missing)
-    })
-    
-    # Filter: Identify words present in JD but missing in CV
-    df_missing = df_jd[df_jd["cv_score"] == 0]["Keywords"]
+    # The analysis is memoized, so in Strict Mode this reuses the result computed above.
+    analysis = analyze_keywords(cv_text, job_description)
 
     # 2. DISPLAY ALL MISSING KEYWORDS (General List)
-    if not df_missing.empty:
-        with st.expander("👀 View All Missing Keywords"):
+    # The analysis only holds the indices of the missing words; the table is built when the
+    # user opens it (a toggle, because a collapsed expander still renders its content).
+    if len(analysis.missing) > 0:
+        if st.toggle(f"👀 View All Missing Keywords ({len(analysis.missing)})", key="show_missing_keywords"):
+            with metrics.timer("keyword_dataframe"):
+                df_missing = pd.Series(analysis.missing_keywords, name="Keywords")
             st.warning("Tip: These words appear in the job description but were not found in your resume. Consider adding them where relevant.")
             st.dataframe(
                 df_missing,   
@@ -409,9 +830,8 @@ if st.session_state.cv_text and job_description \
         
     
     # 3. PRIORITY ANALYSIS (Main Requirements)
-    # Sort keywords by 'jd_score'. High score = Word appears frequently in Job Desc = Critical Skill.
-    df_jd_sorted = df_jd.sort_values(by="jd_score", ascending=False)
-    requirements_keywords = df_jd_sorted["Keywords"].to_list()
+    # Keywords are pre-sorted by JD weight. High score = Word appears frequently in Job Desc = Critical Skill.
+    requirements_keywords = list(analysis.priority)
 
     st.markdown("### 🎯 Critical Skills Check")
     st.caption("The system has auto-detected the most important words based on the Job Description. You can adjust this list.")
@@ -428,9 +848,11 @@ if st.session_state.cv_text and job_description \
 
     # 4. CRITICAL MISSING CHECK
     if main_requirements:
-        # # Verify availability by checking substrings in the raw CV text.
-        # # This is required to support Custom Keywords and handle punctuation correctly.
-        critical_missing = [word for word in main_requirements if word.lower() not in st.session_state.cv_text.lower()]
+        # Verify availability against the CV's token index (built once per extracted CV).
+        # Matches respect word boundaries ("Java" != "JavaScript") and support Custom Keywords,
+        # multi-word phrases and punctuation such as "C++" or "Node.js".
+        with metrics.timer("skill_match"):
+            critical_missing = cv_index(cv_text).missing(main_requirements)
 
         if len(critical_missing) > 0 :
             # WARNING: User is missing high-priority skills
@@ -441,4 +863,7 @@ if st.session_state.cv_text and job_description \
             st.warning(f"Your resume is missing these top-priority terms: {missing_str}.\n\n**Action Required:** Ensure these keywords are included in your resume to pass the ATS filter.")
         else:
             # SUCCESS: User has all the high-priority skills
-            st.success("✅ **Strong Alignment:** Your resume contains all the selected critical keywords.")
\ No newline at end of file
+            st.success("✅ **Strong Alignment:** Your resume contains all the selected critical keywords.")
+
+# Full script run (reruns that end early with st.stop() are not recorded)
+metrics.observe("script_run", time.perf_counter() - _script_start)
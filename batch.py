@@ -0,0 +1,74 @@
+import pandas as pd
+from itertools import islice
+from extraction import read_pdfs_cached, iter_uploaded_pdfs, ExtractionError, EMPTY
+from preprocessing import clean_text
+from scanner import score_batch
+
+def extract_batch(uploaded_files, window_size: int = 64):
+    """
+    Extracts and cleans the text of every PDF in the upload (plain files and ZIP archives).
+    Returns two lists:
+    - resumes: [(file_name, cleaned_text, total_pages)] for readable documents.
+    - failures: [(file_name, category, reason)] for files that could not be used
+      (category is one of the extraction error categories, e.g. 'encrypted').
+    """
+    resumes, failures = [], []
+
+    # Extract in windows: every window runs in parallel on the worker pool,
+    # while memory stays bounded to 'window' PDFs at a time
+    uploads = iter_uploaded_pdfs(uploaded_files)
+    while True:
+        window = list(islice(uploads, window_size))
+        if not window:
+            break
+
+        # Unreadable archives arrive as errors and skip extraction
+        readable = [(name, data) for name, data in window if not isinstance(data, ExtractionError)]
+        failures.extend((name, data.category, str(data)) for name, data in window if isinstance(data, ExtractionError))
+
+        extracted = read_pdfs_cached([data for _, data in readable])
+        for (name, _), result in zip(readable, extracted):
+            if isinstance(result, ExtractionError):
+                failures.append((name, result.category, str(result)))
+                continue
+
+            text, total_pages = result
+            text = clean_text(text)
+            # A PDF with pages but no selectable text (e.g., a scanned image) cannot be scored
+            if not text:
+                failures.append((name, EMPTY, "The PDF contains no selectable text."))
+                continue
+
+            resumes.append((name, text, total_pages))
+
+    return resumes, failures
+
+def rank_resumes(resumes, job_description: str, model, batch_size: int = 32):
+    """
+    Scores every resume against a single Job Description in one pass.
+
+    - Strict (TF-IDF): The vectorizer is fitted on the JD exactly once, then all CVs
+      are transformed together into a single sparse matrix.
+    - Flexible (SBERT): The JD is embedded once, and all CVs are embedded through
+      batched model.encode(list, batch_size=...) calls instead of one call per file.
+
+    Returns a DataFrame sorted by Strict score (highest first).
+    """
+    names = [name for name, _, _ in resumes]
+    texts = [text for _, text, _ in resumes]
+    pages = [total_pages for _, _, total_pages in resumes]
+
+    # 1. SCORE: One TF-IDF fit + one sparse transform, and batched SBERT encoding
+    strict_scores, flexible_scores = score_batch(texts, job_description, encoder=model, batch_size=batch_size)
+
+    # 2. BUILD RANKING TABLE
+    df_rank = pd.DataFrame({
+        "Resume": names,
+        "Pages": pages,
+        "Strict Score": strict_scores,
+        "Flexible Score": flexible_scores,
+    })
+    df_rank = df_rank.sort_values(by="Strict Score", ascending=False, ignore_index=True)
+    df_rank.insert(0, "Rank", range(1, len(df_rank) + 1))
+
+    return df_rank
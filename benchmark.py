@@ -0,0 +1,381 @@
+"""
+Reproducible benchmark for the scoring pipeline of Resume Scanner Pro.
+
+Generates a synthetic corpus (resume PDFs of 1-10 pages, Job Descriptions of
+200-5,000 words, in several languages) from a fixed seed and times every stage
+separately, exactly as the app runs it:
+
+    extract          PyPDF2 text extraction (extraction.read_pdf, in-process, uncached)
+    clean_text       preprocessing.clean_text on the CV and the JD
+    tfidf_fit        JD profile fit (jd_profile.build_job_profile, uncached)
+    tfidf_transform  Transform of the CV with the JD vocabulary
+    keyword_table    Keyword gaps on the sparse CV row (scoring.analyze_keywords, uncached) +
+                     the "Missing Keywords" / "Critical Skills" tables
+    embed            One encode() call for the (CV, JD) pair, like Flexible Mode
+
+Each stage reports throughput, p50/p95 latency and the process' peak RSS after it ran.
+Every stage first runs once untimed, so lazy imports are not charged to its first call.
+Results are written as JSON so two runs can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+By default a tiny hashing encoder stands in for SBERT, so the benchmark runs offline and
+the other stages are not drowned out by model noise. Use --encoder sbert to time the real
+model (with RESUME_SCANNER_BACKEND / --backend selecting the inference backend).
+"""
+import os
+import sys
+import json
+import atexit
+import shutil
+import time
+import random
+import zlib
+import platform
+import tempfile
+import argparse
+import subprocess
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+STAGES = ["extract", "clean_text", "tfidf_fit", "tfidf_transform", "keyword_table", "embed"]
+
+# --- SYNTHETIC CORPUS ---
+# Small per-language vocabularies: shared tech skills (so CVs and JDs overlap like real
+# postings) plus filler words. Only Latin-1 text, which the standard PDF fonts can encode.
+SKILLS = ["python", "django", "flask", "sql", "postgresql", "docker", "kubernetes", "aws", "react",
+          "typescript", "pandas", "tableau", "excel", "airflow", "spark", "terraform", "git", "linux",
+          "tensorflow", "pytorch", "scrum", "jira", "figma", "laravel", "php", "java", "spring", "kafka"]
+FILLER = {
+    "en": "experience team project developed managed built led improved customer data systems "
+          "analysis reporting requirements design delivery stakeholders quality process support".split(),
+    "es": "experiencia equipo proyecto desarrollo gestión diseño clientes datos sistemas análisis "
+          "informes requisitos calidad proceso soporte mejora liderazgo".split(),
+    "de": "Erfahrung Team Projekt Entwicklung Kunden Daten Systeme Analyse Berichte Anforderungen "
+          "Qualität Prozess Unterstützung Verbesserung Führung Lösungen".split(),
+    "fr": "expérience équipe projet développement clients données systèmes analyse rapports exigences "
+          "qualité processus soutien amélioration gestion conception".split(),
+    "id": "pengalaman tim proyek pengembangan pelanggan data sistem analisis laporan kebutuhan "
+          "kualitas proses dukungan peningkatan manajemen desain".split(),
+}
+WORDS_PER_PAGE = 450
+
+def synthetic_text(rng: random.Random, n_words: int, language: str, skill_share: float = 0.15) -> str:
+    """Random text of 'n_words' words, with roughly 'skill_share' of them drawn from SKILLS."""
+    filler = FILLER[language]
+    words = [rng.choice(SKILLS) if rng.random() < skill_share else rng.choice(filler) for _ in range(n_words)]
+    # Sentences of 8-16 words, so clean_text and the tokenizers see realistic punctuation
+    out, i = [], 0
+    while i < len(words):
+        n = rng.randint(8, 16)
+        out.append(" ".join(words[i:i + n]).capitalize() + ".")
+        i += n
+    return " ".join(out)
+
+def _pdf_escape(line: str) -> bytes:
+    return line.encode("latin-1", "replace").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def make_pdf(pages) -> bytes:
+    """
+    Writes a minimal, valid PDF with one text page per entry of 'pages' (Helvetica,
+    WinAnsiEncoding). Kept dependency-free so the benchmark only needs the app's own requirements.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    page_refs = []
+    for text in pages:
+        lines, line = [], ""
+        for word in text.split():
+            if len(line) + len(word) > 95:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}" if line else word
+        lines.append(line)
+
+        content = b"BT /F1 9 Tf 11 TL 40 800 Td " + b" ".join(b"(" + _pdf_escape(l) + b") '" for l in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(page_refs) + b"] /Count %d >>" % len(page_refs)
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def build_corpus(n_docs: int, seed: int = 0, min_pages: int = 1, max_pages: int = 10,
+                 min_jd_words: int = 200, max_jd_words: int = 5000, languages=tuple(FILLER)):
+    """
+    Deterministic list of samples: dicts with 'pdf' (bytes), 'pages', 'jd', 'jd_words' and 'language'.
+    Page counts and JD lengths are spread evenly over their ranges (JD length log-uniform).
+    """
+    rng = random.Random(seed)
+    samples = []
+    for i in range(n_docs):
+        language = languages[i % len(languages)]
+        pages = min_pages + i % (max_pages - min_pages + 1)
+        jd_words = int(round(min_jd_words * (max_jd_words / min_jd_words) ** rng.random()))
+        samples.append({
+            "language": language,
+            "pages": pages,
+            "jd_words": jd_words,
+            "pdf": make_pdf([synthetic_text(rng, WORDS_PER_PAGE, language) for _ in range(pages)]),
+            "jd": synthetic_text(rng, jd_words, language, skill_share=0.25),
+        })
+    return samples
+
+# --- STAND-IN ENCODER ---
+class HashingEncoder:
+    """
+    Tiny offline stand-in for SentenceTransformer: a hashed bag of words.
+    Deterministic and dependency-free; its cost is a rough lower bound for the real model.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+# --- MEASUREMENT ---
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def summarize(latencies, items: int, extra=None) -> dict:
+    """Throughput and latency percentiles for one stage ('latencies' in seconds)."""
+    latencies = np.asarray(latencies)
+    total = float(latencies.sum())
+    summary = {
+        "runs": len(latencies),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(items / total, 3) if total > 0 else None,
+        "mean_ms": round(float(latencies.mean()) * 1000, 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if resource else None,
+    }
+    summary.update(extra or {})
+    return summary
+
+def _clear_memo_caches():
+    """Empties the process-wide scoring caches, so every run pays the full cost."""
+    import scoring
+    import jd_profile
+    scoring._analysis_cache.clear()
+    jd_profile._profile_cache.clear()
+
+def keyword_table(cv: str, jd: str):
+    """Mirrors the app's "Missing Keywords" table and "Critical Skills" options."""
+    import pandas as pd
+    from scoring import analyze_keywords
+
+    analysis = analyze_keywords(cv, jd)
+    return pd.Series(analysis.missing_keywords, name="Keywords"), list(analysis.priority)
+
+def warm_up(sample, encoder):
+    """
+    Runs every stage once, untimed, on one sample. The first call of a stage pays for lazy
+    imports (PyPDF2, scikit-learn, pandas) and one-off setup, which would otherwise dominate
+    its p95 and show up as the stage's peak RSS.
+    """
+    from extraction import read_pdf
+    from preprocessing import clean_text
+    from jd_profile import build_job_profile
+
+    cv, jd = clean_text(read_pdf(sample["pdf"])[0]), clean_text(sample["jd"])
+    build_job_profile(jd).transform([cv])
+    keyword_table(cv, jd)
+    encoder.encode([cv, jd], normalize_embeddings=True)
+    _clear_memo_caches()
+
+def run(samples, encoder, repeat: int = 1) -> dict:
+    """
+    Times every stage over all samples ('repeat' rounds). Stages run one after another over
+    the whole corpus, so the peak RSS reported after each stage is attributable to it.
+    Call warm_up() first, so no stage is charged for imports.
+    """
+    from extraction import read_pdf
+    import scoring
+    from preprocessing import clean_text
+    from jd_profile import build_job_profile, get_job_profile
+
+    timings = {stage: [] for stage in STAGES}
+    raw, cvs, jds, profiles = [], [], [], []
+
+    def timed_call(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage].append(time.perf_counter() - start)
+        return result
+
+    for _ in range(repeat):
+        raw = [timed_call("extract", read_pdf, sample["pdf"])[0] for sample in samples]
+    results = {"extract": summarize(timings["extract"], len(samples) * repeat, {
+        "pages_per_s": round(sum(s["pages"] for s in samples) * repeat / sum(timings["extract"]), 3)})}
+
+    for _ in range(repeat):
+        cvs = [timed_call("clean_text", clean_text, text) for text in raw]
+        jds = [timed_call("clean_text", clean_text, sample["jd"]) for sample in samples]
+    results["clean_text"] = summarize(timings["clean_text"], 2 * len(samples) * repeat)
+
+    for _ in range(repeat):
+        profiles = []
+        for jd in jds:
+            _clear_memo_caches()
+            profiles.append(timed_call("tfidf_fit", build_job_profile, jd))
+    results["tfidf_fit"] = summarize(timings["tfidf_fit"], len(samples) * repeat)
+
+    for _ in range(repeat):
+        for cv, profile in zip(cvs, profiles):
+            timed_call("tfidf_transform", profile.transform, [cv])
+    results["tfidf_transform"] = summarize(timings["tfidf_transform"], len(samples) * repeat)
+
+    # Fitted profiles are reused here (their fit was measured above)
+    for jd in jds:
+        get_job_profile(jd)
+    for _ in range(repeat):
+        for cv, jd in zip(cvs, jds):
+            # Keep the fitted profile (measured above), drop only the per-pair analysis
+            scoring._analysis_cache.clear()
+            timed_call("keyword_table", keyword_table, cv, jd)
+    results["keyword_table"] = summarize(timings["keyword_table"], len(samples) * repeat)
+
+    for _ in range(repeat):
+        for cv, jd in zip(cvs, jds):
+            timed_call("embed", lambda a, b: encoder.encode([a, b], normalize_embeddings=True), cv, jd)
+    results["embed"] = summarize(timings["embed"], 2 * len(samples) * repeat)
+
+    return results
+
+def _git_commit():
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        return completed.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10):
+    """
+    Compares the p50 latency of every stage with a baseline run.
+    Returns a list of (stage, baseline_ms, current_ms, ratio, regressed).
+    """
+    rows = []
+    for stage in STAGES:
+        old = baseline.get("stages", {}).get(stage)
+        new = current["stages"].get(stage)
+        if not old or not new:
+            continue
+        ratio = new["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        rows.append((stage, old["p50_ms"], new["p50_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Resume Scanner pipeline on a synthetic corpus.")
+    parser.add_argument("--docs", type=int, default=20, help="Number of (resume, JD) samples.")
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--min-jd-words", type=int, default=200)
+    parser.add_argument("--max-jd-words", type=int, default=5000)
+    parser.add_argument("--languages", default=",".join(FILLER), help="Comma-separated subset of: " + ", ".join(FILLER))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds over the corpus per stage.")
+    parser.add_argument("--encoder", choices=["stub", "sbert"], default="stub",
+                        help="'stub' is an offline hashing encoder; 'sbert' loads the real model.")
+    parser.add_argument("--backend", help="Inference backend for --encoder sbert (see encoder.BACKENDS).")
+    parser.add_argument("--output", "-o", default="benchmark.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", help="A previous results JSON to compare p50 latencies against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown counted as a regression.")
+    args = parser.parse_args(argv)
+
+    # Benchmark against empty on-disk caches (unless a cache folder is given explicitly),
+    # so results never depend on what earlier runs or the app left behind
+    if "RESUME_SCANNER_CACHE_DIR" not in os.environ:
+        cache_dir = tempfile.mkdtemp(prefix="resume-scanner-bench-")
+        atexit.register(shutil.rmtree, cache_dir, True)
+        os.environ["RESUME_SCANNER_CACHE_DIR"] = cache_dir
+        # (The throwaway folder lets the disk tiers be measured without keeping any data)
+        os.environ["RESUME_SCANNER_PERSIST"] = "1"
+
+    languages = tuple(args.languages.split(","))
+    samples = build_corpus(args.docs, args.seed, args.min_pages, args.max_pages,
+                           args.min_jd_words, args.max_jd_words, languages)
+
+    if args.encoder == "sbert":
+        import encoder as encoder_module
+        backend = args.backend or encoder_module.BACKEND
+        model = encoder_module.load_encoder(encoder_module.MODEL_NAME, backend)
+        encoder_name = f"{encoder_module.MODEL_NAME} ({backend})"
+    else:
+        model = HashingEncoder()
+        encoder_name = "stub"
+
+    warm_up(samples[0], model)
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "encoder": encoder_name,
+            "corpus": {"docs": args.docs, "seed": args.seed, "languages": list(languages),
+                       "pages": [args.min_pages, args.max_pages],
+                       "jd_words": [args.min_jd_words, args.max_jd_words],
+                       "total_pages": sum(s["pages"] for s in samples)},
+            "repeat": args.repeat,
+            # Peak RSS once every stage ran once (imports included): the floor of the per-stage peaks
+            "warm_up_peak_rss_mb": round(peak_rss_mb(), 1) if resource else None,
+        },
+        "stages": run(samples, model, args.repeat),
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'Stage':<18}{'p50 (ms)':>12}{'p95 (ms)':>12}{'items/s':>12}{'peak RSS (MB)':>16}")
+    for stage, s in results["stages"].items():
+        rss = "n/a" if s["peak_rss_mb"] is None else f"{s['peak_rss_mb']:.1f}"
+        print(f"{stage:<18}{s['p50_ms']:>12.3f}{s['p95_ms']:>12.3f}{s['throughput_per_s'] or 0:>12.1f}{rss:>16}")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n{'Stage':<18}{'before (ms)':>12}{'after (ms)':>12}{'ratio':>8}")
+        for stage, old, new, ratio, regressed in rows:
+            print(f"{stage:<18}{old:>12.3f}{new:>12.3f}{ratio:>8.2f}{'  REGRESSION' if regressed else ''}")
+        if any(row[4] for row in rows):
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
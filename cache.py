@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, so a cache folder is only safe for one writer process
+    fcntl = None
+
+# Root folder for every on-disk cache tier. Override it with RESUME_SCANNER_CACHE_DIR
+# (e.g., to point at a shared volume when running several replicas).
+CACHE_ROOT = os.environ.get(
+    "RESUME_SCANNER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "resume-scanner")
+)
+
+# Disk tiers holding document-derived data (extracted text, embeddings, JD profiles, the
+# resume index) are opt-in: only with RESUME_SCANNER_PERSIST=1 are they written under
+# CACHE_ROOT. By default every tier is memory-only, so no upload outlives the process.
+PERSIST = os.environ.get("RESUME_SCANNER_PERSIST", "0") == "1"
+PERSISTENT_TIERS = ("extraction", "embeddings", "profiles", "index")
+
+def persistent_dir(*parts):
+    """The folder of a disk tier under CACHE_ROOT, or None when persistence is off."""
+    return os.path.join(CACHE_ROOT, *parts) if PERSIST else None
+
+def purge(root: str = CACHE_ROOT) -> int:
+    """Deletes every persisted tier under 'root' (e.g., after a data request). Returns the number of files removed."""
+    removed = 0
+    for tier in PERSISTENT_TIERS:
+        path = os.path.join(root, tier)
+        removed += sum(len(files) for _, _, files in os.walk(path))
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+def content_hash(data) -> str:
+    """
+    Returns the SHA-256 hex digest of raw bytes or a string.
+    Identical content always maps to the same key, regardless of file name or uploader.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def sizeof(value) -> int:
+    """Approximate memory held by a cached value (strings, bytes, numpy arrays, DataFrames, containers, 'nbytes')."""
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+def evict_oldest(folder: str, suffix: str, max_items: int) -> int:
+    """
+    Deletes the least recently used files ending in 'suffix' (oldest modification time first),
+    trimming 'folder' to ~90% of 'max_items' so it is not rescanned on every insert.
+    Returns the number of files left.
+    """
+    entries = []
+    for name in os.listdir(folder):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+
+    entries.sort()
+    target = int(max_items * 0.9)
+    removed = 0
+    for _, path in entries[:max(len(entries) - target, 0)]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+    return len(entries) - removed
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Exclusive inter-process lock on 'path' (created if missing) for the duration of the block.
+    Serializes writers from different processes sharing a cache folder (e.g., the CLI
+    running next to the app). Raises OSError when the lock file cannot be created.
+    """
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded in-memory cache with Least-Recently-Used eviction.
+    Streamlit serves every session from threads of the same process, so a single
+    instance can be shared safely across users.
+
+    Bounded by 'max_items' and, when given, by 'max_bytes' as measured by sizeof()
+    (a value larger than 'max_bytes' on its own is not cached at all).
+    """
+
+    def __init__(self, max_items: int = 128, max_bytes: int = None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached value (or None) and marks it as recently used."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entries beyond 'max_items' / 'max_bytes'."""
+        size = sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self.bytes -= self._sizes.pop(key, 0)
+            self._data.pop(key, None)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._data) > self.max_items or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                evicted, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(evicted)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring cache effectiveness (plus 'bytes' when bounded by size)."""
+        stats = {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+        if self.max_bytes is not None:
+            stats["bytes"] = self.bytes
+        return stats
+
+class DiskLRUCache(LRUCache):
+    """
+    An LRUCache whose entries also spill to local disk as small JSON files.
+
+    - Memory tier: Bounded by 'max_items', evicted in LRU order.
+    - Disk tier: Bounded by 'max_disk_items'. File modification times track recency,
+      so the oldest-used files are deleted first when the limit is exceeded.
+
+    A miss in memory falls back to disk and promotes the entry back into memory,
+    which lets results survive restarts and be shared between processes.
+    Values must be JSON-serializable. With cache_dir=None (see persistent_dir()) the
+    cache is memory-only.
+    """
+
+    def __init__(self, cache_dir: str, max_items: int = 128, max_disk_items: int = 10_000, max_bytes: int = None):
+        super().__init__(max_items=max_items, max_bytes=max_bytes)
+        self.cache_dir = cache_dir
+        self.max_disk_items = max_disk_items
+        self.disk_hits = 0
+        self._disk_count = 0
+        if cache_dir is None:
+            return
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_count = sum(1 for f in os.listdir(cache_dir) if f.endswith(".json"))
+        except OSError:
+            # No writable cache folder (e.g., read-only container): run memory-only
+            self.cache_dir = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        value = super().get(key)
+        if value is not None:
+            return value
+
+        # Memory miss: try the disk tier
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # Refresh the modification time so the file counts as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self.disk_hits += 1
+        super().put(key, value)
+        return value
+
+    def put(self, key, value):
+        super().put(key, value)
+        if self.cache_dir is None:
+            return
+
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        try:
+            # Write to a temp file first so concurrent readers never see a half-written entry
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A read-only or full disk only disables the spill tier; memory caching still works
+            return
+
+        if is_new:
+            with self._lock:
+                self._disk_count += 1
+                over_limit = self._disk_count > self.max_disk_items
+            if over_limit:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Deletes the least recently used files, trimming the folder to ~90% of its limit."""
+        remaining = evict_oldest(self.cache_dir, ".json", self.max_disk_items)
+        with self._lock:
+            self._disk_count = remaining
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({"disk_hits": self.disk_hits, "disk_size": self._disk_count})
+        return stats
+
+if __name__ == "__main__":
+    # python cache.py purge: delete every persisted tier under CACHE_ROOT
+    import sys
+    if sys.argv[1:] != ["purge"]:
+        raise SystemExit("Usage: python cache.py purge")
+    print(f"Removed {purge()} cached files from {CACHE_ROOT}")
@@ -0,0 +1,132 @@
+"""
+Command-line batch scanner: scores every PDF in a folder against one Job Description
+without starting Streamlit.
+
+Usage:
+    python cli.py resumes/ --jd job_description.txt --output results.jsonl
+    python cli.py resumes/ --jd job_description.txt --output results.csv --mode strict
+
+Files are streamed in batches, and each batch is written to the output as soon as it is
+scored, so memory stays flat no matter how many PDFs the folder contains.
+"""
+import os
+import csv
+import sys
+import json
+import argparse
+import scanner
+from preprocessing import clean_text
+from extraction import ExtractionError, EMPTY
+
+FIELDS = ["file", "pages", "strict_score", "flexible_score", "missing_keywords",
+          "critical_missing", "error", "error_detail"]
+
+def iter_pdf_paths(folder: str):
+    """Yields every PDF path under 'folder' (recursively) in a stable, sorted order."""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(root, name)
+
+def iter_batches(items, size: int):
+    """Groups an iterable into lists of at most 'size' items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def scan_batch(paths, job_description: str, mode: str, top_n: int, batch_size: int):
+    """Extracts and scores one batch of PDFs. Returns one result row per file."""
+    rows, texts, scored_rows = [], [], []
+
+    # 1. EXTRACT: All files of the batch in parallel; unreadable files become error rows
+    documents = []
+    for path in paths:
+        row = dict.fromkeys(FIELDS)
+        row["file"] = path
+        rows.append(row)
+        try:
+            with open(path, "rb") as f:
+                documents.append(f.read())
+        except OSError as e:
+            row["error"], row["error_detail"] = "unreadable", str(e)
+            documents.append(b"")
+
+    for row, result in zip(rows, scanner.extract_many(documents)):
+        if row["error"]:
+            continue
+        if isinstance(result, ExtractionError):
+            row["error"], row["error_detail"] = result.category, str(result)
+            continue
+
+        text, row["pages"] = result
+        if not text:
+            row["error"], row["error_detail"] = EMPTY, "The PDF contains no selectable text."
+            continue
+        texts.append(text)
+        scored_rows.append(row)
+
+    if not texts:
+        return rows
+
+    # 2. SCORE: One sparse transform and one batched embedding call for the whole batch
+    strict_scores, flexible_scores = scanner.score_batch(
+        texts, job_description, flexible=mode != "strict", batch_size=batch_size
+    )
+
+    # 3. KEYWORD GAPS: The Critical Skills are compiled once for the whole batch
+    all_gaps = scanner.keyword_gaps_many(texts, job_description, top_n=top_n)
+    for i, (row, gaps) in enumerate(zip(scored_rows, all_gaps)):
+        if mode != "flexible":
+            row["strict_score"] = round(float(strict_scores[i]), 4)
+        if flexible_scores is not None:
+            row["flexible_score"] = round(float(flexible_scores[i]), 4)
+        row["missing_keywords"] = len(gaps["missing"])
+        row["critical_missing"] = gaps["critical_missing"]
+
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder of resume PDFs against a Job Description.")
+    parser.add_argument("folder", help="Folder containing resume PDFs (searched recursively).")
+    parser.add_argument("--jd", required=True, help="Path to a text file with the Job Description.")
+    parser.add_argument("--output", "-o", default="-", help="Output file (.jsonl or .csv). Defaults to JSONL on stdout.")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (inferred from --output when omitted).")
+    parser.add_argument("--mode", choices=["strict", "flexible", "both"], default="both", help="Which scores to compute.")
+    parser.add_argument("--batch-size", type=int, default=64, help="PDFs extracted and scored per batch.")
+    parser.add_argument("--top-n", type=int, default=5, help="Number of Critical Skills checked per resume.")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, "r", encoding="utf-8") as f:
+        job_description = clean_text(f.read())
+
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+
+    try:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+
+        total = 0
+        for paths in iter_batches(iter_pdf_paths(args.folder), args.batch_size):
+            for row in scan_batch(paths, job_description, args.mode, args.top_n, args.batch_size):
+                if writer:
+                    writer.writerow({**row, "critical_missing": ";".join(row["critical_missing"] or [])})
+                else:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            total += len(paths)
+            print(f"Scanned {total} file(s)...", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import threading
+import numpy as np
+import metrics
+from cache import LRUCache, content_hash, file_lock, persistent_dir
+
+def embedding_key(model_name: str, text: str) -> str:
+    """
+    Cache key for one embedding: the model name plus the whitespace-normalized text.
+    Texts that only differ in spacing/line breaks share the same vector.
+    """
+    normalized = " ".join(text.split())
+    return content_hash(f"{model_name}\x00{normalized}")
+
+class EmbeddingStore:
+    """
+    A two-tier cache of sentence embeddings keyed by (model name, normalized text hash).
+
+    - Memory tier: An LRUCache of vectors shared by every Streamlit session in the process.
+    - Disk tier: One append-only binary file of fixed-size rows (float16 by default),
+      read through a numpy memmap, plus a small text index mapping each key to its row.
+      Vectors survive restarts without loading the whole file into RAM. Without an
+      explicit 'cache_dir' it is only enabled by RESUME_SCANNER_PERSIST=1 (see cache.py).
+
+    EmbeddingStore.encode() mirrors SentenceTransformer.encode(), so it can be passed
+    anywhere a model is expected. Only texts that miss both tiers reach the model,
+    and all of them are encoded in a single batched call.
+
+    Appends take an inter-process file lock and place new rows at the current end of the
+    vectors file, so several writer processes (or rows orphaned by an interrupted append)
+    never shift a key onto another text's vector.
+    """
+
+    def __init__(self, model, model_name: str, cache_dir: str = None, max_items: int = 4096,
+                 dtype: str = "float16", max_disk_rows: int = 1_000_000):
+        self.model = model
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.dim = model.get_sentence_embedding_dimension()
+        self.max_disk_rows = max_disk_rows
+        self.memory = LRUCache(max_items=max_items)
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index = {}
+        self._memmap = None
+        self.cache_dir = cache_dir or persistent_dir("embeddings", model_name.replace("/", "__"))
+        self._load_index()
+
+    # --- DISK TIER ---
+    def _paths(self):
+        return (os.path.join(self.cache_dir, f"vectors.{self.dtype.name}"),
+                os.path.join(self.cache_dir, "index.tsv"))
+
+    def _load_index(self):
+        """Reads the key -> row index. A missing or unwritable folder disables the disk tier."""
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._index_offset = 0
+            self._read_index_lines()
+        except OSError:
+            self.cache_dir = None
+
+    def _read_index_lines(self):
+        """Adds the index lines written since the last read (by this or another process)."""
+        vectors_path, index_path = self._paths()
+        if not os.path.exists(index_path):
+            return
+        row_bytes = self.dim * self.dtype.itemsize
+        n_rows = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+
+        with open(index_path, "rb") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn last line (crash mid-append): ignored, and cut off by the next append
+                    break
+                self._index_offset += len(line)
+                key, _, row = line.decode("utf-8").rstrip("\n").partition("\t")
+                # Ignore index lines whose vector was never fully written (e.g., crash mid-append)
+                if row.isdigit() and int(row) < n_rows:
+                    self._index[key] = int(row)
+
+    def _read_rows(self, rows):
+        """Reads vectors from the memmap, remapping when the file has grown since the last read."""
+        vectors_path, _ = self._paths()
+        needed = max(rows) + 1
+        if self._memmap is None or self._memmap.shape[0] < needed:
+            n_rows = os.path.getsize(vectors_path) // (self.dim * self.dtype.itemsize)
+            self._memmap = np.memmap(vectors_path, dtype=self.dtype, mode="r", shape=(n_rows, self.dim))
+        return np.asarray(self._memmap[rows], dtype=np.float32)
+
+    def _append_rows(self, keys, vectors):
+        """Appends new vectors and their index lines; silently skips when the disk tier is full or unavailable."""
+        if self.cache_dir is None:
+            return
+        vectors_path, index_path = self._paths()
+        row_bytes = self.dim * self.dtype.itemsize
+        try:
+            with file_lock(os.path.join(self.cache_dir, "write.lock")):
+                # 1. Pick up rows other processes appended, so no text is stored twice
+                self._read_index_lines()
+                new = [i for i, key in enumerate(keys) if key not in self._index]
+                keys, vectors = [keys[i] for i in new], vectors[new]
+
+                # 2. New rows start at the end of the file, not at len(index): orphan rows left by an
+                #    interrupted append are skipped, and a torn partial row is cut off first
+                with open(vectors_path, "ab") as f:
+                    start = f.tell() // row_bytes
+                    if f.tell() != start * row_bytes:
+                        f.truncate(start * row_bytes)
+                    if not keys or start + len(keys) > self.max_disk_rows:
+                        return
+                    f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+
+                # 3. Index lines only after their vectors are on disk
+                with open(index_path, "ab") as f:
+                    # A torn last line (crash mid-append) is cut off instead of being completed
+                    f.truncate(self._index_offset)
+                    f.write("".join(f"{key}\t{start + i}\n" for i, key in enumerate(keys)).encode("utf-8"))
+                    self._index_offset = f.tell()
+            for i, key in enumerate(keys):
+                self._index[key] = start + i
+        except OSError:
+            self.cache_dir = None
+
+    # --- PUBLIC API ---
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True, **kwargs):
+        """
+        Drop-in replacement for model.encode() backed by the cache.
+        Accepts a single string (returns a 1-D vector) or a list (returns a 2-D array).
+        Extra keyword arguments are forwarded to the model on a cache miss.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        # 1. MEMORY TIER
+        pending = []
+        for i, key in enumerate(keys):
+            vector = self.memory.get(key)
+            if vector is not None:
+                result[i] = vector
+            else:
+                pending.append(i)
+
+        with self._lock:
+            # 2. DISK TIER
+            on_disk = [i for i in pending if keys[i] in self._index]
+            if on_disk:
+                vectors = self._read_rows([self._index[keys[i]] for i in on_disk])
+                for i, vector in zip(on_disk, vectors):
+                    result[i] = vector
+                    self.memory.put(keys[i], vector)
+                self.disk_hits += len(on_disk)
+
+            # 3. MODEL: One batched forward pass for every remaining (unique) text
+            missing = [i for i in pending if keys[i] not in self._index]
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            if unique:
+                first_text = {keys[i]: texts[i] for i in reversed(missing)}
+                with metrics.timer("model_encode"):
+                    vectors = self.model.encode(
+                        [first_text[key] for key in unique],
+                        batch_size=batch_size,
+                        convert_to_numpy=True,
+                        **kwargs
+                    ).astype(np.float32)
+                metrics.count("encoded_texts", len(unique))
+                by_key = dict(zip(unique, vectors))
+                for i in missing:
+                    result[i] = by_key[keys[i]]
+                for key, vector in by_key.items():
+                    self.memory.put(key, vector)
+                self._append_rows(unique, vectors)
+                self.misses += len(unique)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(result, axis=1, keepdims=True)
+            result = result / np.clip(norms, 1e-12, None)
+
+        if not convert_to_numpy:
+            import torch
+            result = torch.from_numpy(result)
+        return result[0] if single else result
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def stats(self) -> dict:
+        """Hit/miss counters: 'memory_hits' and 'disk_hits' skipped the model, 'misses' did not."""
+        return {
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": len(self.memory),
+            "disk_size": len(self._index),
+        }
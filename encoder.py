@@ -0,0 +1,231 @@
+import os
+import time
+import threading
+import metrics
+from startup import timed
+
+# Using 'paraphrase-multilingual-MiniLM-L12-v2' for good performance across languages
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# --- INFERENCE BACKENDS ---
+# - torch: The original full-precision (fp32) PyTorch model, on a GPU when one is available.
+# - int8:  PyTorch with dynamic int8 quantization of every Linear layer (no extra dependencies).
+# - onnx:  An exported ONNX Runtime graph on the CPU execution provider
+#          (requires `pip install "sentence-transformers[onnx]"`).
+BACKENDS = ("torch", "int8", "onnx")
+BACKEND = os.environ.get("RESUME_SCANNER_BACKEND", "torch")
+# Intra-op threads used by the encoder (0 = library default, usually one per core).
+# With several Streamlit workers per node, 1-2 threads each avoids oversubscribing the CPU.
+THREADS = int(os.environ.get("RESUME_SCANNER_THREADS", "0"))
+
+_models = {}
+_models_lock = threading.Lock()
+
+def ensure_nltk_data():
+    """
+    Checks if 'stopwords' data is already available locally.
+    If not found (LookupError), downloads it immediately.
+    """
+    import nltk
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+
+def cache_name(model_name: str = MODEL_NAME, backend: str = BACKEND) -> str:
+    """
+    Name under which a model's embeddings are cached (see embeddings.EmbeddingStore).
+    Quantized backends produce slightly different vectors, so they get their own cache
+    instead of mixing with (or reading) the fp32 vectors.
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+def _quantize_int8(model):
+    """Replaces every Linear layer with a dynamically quantized int8 version (weights int8, activations fp32)."""
+    import torch
+
+    with timed("quantize model (int8)"):
+        # inplace=True avoids holding a second (fp32) copy of the weights while converting
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def _onnx_model_kwargs(threads: int) -> dict:
+    """ONNX Runtime options: CPU provider only, with an explicit thread count when one is set."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError(
+            "The 'onnx' backend requires ONNX Runtime and Optimum: "
+            "pip install \"sentence-transformers[onnx]\""
+        ) from None
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads > 0:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+    return {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+def load_encoder(model_name: str = MODEL_NAME, backend: str = BACKEND, threads: int = THREADS):
+    """
+    Loads the SBERT (Sentence-BERT) model for semantic similarity analysis.
+    This is the framework-agnostic loader: the Streamlit app wraps it with
+    @st.cache_resource, while headless code (scanner.py, cli.py) calls it directly
+    or injects its own model instead.
+
+    'backend' selects the inference path (see BACKENDS) and 'threads' the number of
+    intra-op threads. Both default to RESUME_SCANNER_BACKEND / RESUME_SCANNER_THREADS.
+    Only 'int8' and 'onnx' are pinned to the CPU; 'torch' keeps sentence-transformers'
+    default device (CUDA when available).
+
+    sentence_transformers (and torch with it) is imported here rather than at module
+    level, so processes that never compute a Flexible score never pay for it.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}'. Choose one of: {', '.join(BACKENDS)}.")
+
+    with timed("import sentence_transformers"):
+        from sentence_transformers import SentenceTransformer
+
+    ensure_nltk_data()
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+    with timed(f"load model ({model_name}, {backend})"):
+        if backend == "onnx":
+            return SentenceTransformer(model_name, device="cpu", backend="onnx",
+                                       model_kwargs=_onnx_model_kwargs(threads))
+
+        if backend == "int8":
+            # Dynamic quantization only runs on the CPU
+            return _quantize_int8(SentenceTransformer(model_name, device="cpu"))
+        return SentenceTransformer(model_name)
+
+def get_model(model_name: str = MODEL_NAME, backend: str = BACKEND):
+    """
+    Process-wide, load-once access to the encoder.
+    Concurrent callers (e.g., a user request racing the warm-up thread) wait for the
+    same load instead of starting a second one.
+    """
+    key = (model_name, backend)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                rss_before = metrics.rss_bytes()
+                model = _models[key] = load_encoder(model_name, backend)
+                rss_after = metrics.rss_bytes()
+
+                def _model_memory():
+                    return {
+                        "parameter_bytes": metrics.model_memory_bytes(model),
+                        # Covers non-PyTorch backends (ONNX Runtime) and tokenizer/runtime overhead
+                        "load_rss_bytes": rss_after - rss_before if rss_before and rss_after else None,
+                    }
+                metrics.register_collector(f"model_{backend}", _model_memory)
+    return model
+
+def is_loaded(model_name: str = MODEL_NAME, backend: str = BACKEND) -> bool:
+    return (model_name, backend) in _models
+
+def warm_up(model_name: str = MODEL_NAME, backend: str = BACKEND):
+    """
+    Starts loading the model on a background daemon thread and returns the thread.
+    The first page renders immediately; by the time a user asks for a Flexible
+    score the model is usually ready.
+    """
+    def _load():
+        try:
+            get_model(model_name, backend)
+        except Exception:
+            # A failed warm-up is retried (and reported) on first real use
+            pass
+
+    thread = threading.Thread(target=_load, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# --- ACCURACY CHECK ---
+# Fixed (CV, JD) sample pairs in the languages the multilingual model is used for.
+# Mixes close matches, partial matches and unrelated pairs so the whole score range is covered.
+SAMPLE_PAIRS = [
+    ("Senior Python developer with 6 years of Django, REST APIs and PostgreSQL.",
+     "We are hiring a backend engineer experienced in Python, Django and SQL databases."),
+    ("Data analyst skilled in SQL, Tableau dashboards and Excel reporting.",
+     "Looking for a data analyst to build Tableau dashboards and write SQL queries."),
+    ("Registered nurse with ICU experience and advanced cardiac life support certification.",
+     "Frontend developer with strong React and TypeScript skills."),
+    ("Machine learning engineer: PyTorch, model deployment, MLOps on AWS.",
+     "Seeking an ML engineer to train deep learning models and deploy them to the cloud."),
+    ("Pengembang web dengan pengalaman Laravel, PHP dan MySQL selama empat tahun.",
+     "Dibutuhkan backend developer yang menguasai PHP, Laravel dan basis data MySQL."),
+    ("Desarrollador full stack con experiencia en Node.js, React y MongoDB.",
+     "Buscamos un ingeniero de software con conocimientos de JavaScript y React."),
+    ("Projektmanager mit PMP-Zertifizierung und Erfahrung in agilen Methoden.",
+     "Wir suchen einen Buchhalter mit Kenntnissen in DATEV und Lohnabrechnung."),
+    ("Ingénieur DevOps: Kubernetes, Terraform, CI/CD et surveillance avec Prometheus.",
+     "Nous recherchons un ingénieur DevOps maîtrisant Kubernetes et l'automatisation CI/CD."),
+    ("Graphic designer proficient in Adobe Illustrator, Photoshop and brand identity.",
+     "Diseñador gráfico con dominio de Illustrator y Photoshop para campañas de marca."),
+    ("Customer support specialist, fluent in English and Japanese, Zendesk power user.",
+     "Embedded C engineer for automotive microcontrollers and AUTOSAR."),
+]
+
+def _pair_scores(model, pairs, batch_size: int = 32):
+    """Cosine score of every (CV, JD) pair, plus the encode wall time in milliseconds."""
+    texts = [text for pair in pairs for text in pair]
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return (embeddings[0::2] * embeddings[1::2]).sum(axis=1), elapsed_ms
+
+def check_accuracy(backend: str, model_name: str = MODEL_NAME, pairs=None, threads: int = THREADS, repeats: int = 3):
+    """
+    Compares a backend against the fp32 "torch" baseline on a fixed sample set.
+    Returns the per-pair scores of both, the largest and mean absolute score difference,
+    and the best-of-'repeats' encode latency of each (after one warm-up call).
+    """
+    pairs = pairs or SAMPLE_PAIRS
+    results = {}
+    for name in ("torch", backend):
+        model = load_encoder(model_name, name, threads)
+        _pair_scores(model, pairs)
+        runs = [_pair_scores(model, pairs) for _ in range(repeats)]
+        results[name] = (runs[0][0], min(ms for _, ms in runs))
+        del model
+
+    baseline, baseline_ms = results["torch"]
+    scores, backend_ms = results[backend]
+    diff = abs(scores - baseline)
+    return {
+        "backend": backend,
+        "pairs": len(pairs),
+        "baseline_scores": baseline.tolist(),
+        "backend_scores": scores.tolist(),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "baseline_ms": baseline_ms,
+        "backend_ms": backend_ms,
+    }
+
+if __name__ == "__main__":
+    # Usage: python encoder.py --check int8 [--threads 2] [--tolerance 0.02]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare an encoder backend against the fp32 baseline.")
+    parser.add_argument("--check", choices=[b for b in BACKENDS if b != "torch"], required=True,
+                        help="Backend to compare against the fp32 'torch' baseline.")
+    parser.add_argument("--threads", type=int, default=THREADS, help="Intra-op threads (0 = library default).")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Largest acceptable absolute score difference.")
+    args = parser.parse_args()
+
+    report = check_accuracy(args.check, threads=args.threads)
+    print(f"{'Pair':<6}{'fp32':>10}{args.check:>10}{'diff':>10}")
+    for i, (a, b) in enumerate(zip(report["baseline_scores"], report["backend_scores"]), start=1):
+        print(f"{i:<6}{a:>10.4f}{b:>10.4f}{abs(a - b):>10.4f}")
+    print(f"\nmax |diff| = {report['max_abs_diff']:.4f}, mean |diff| = {report['mean_abs_diff']:.4f}")
+    print(f"latency: fp32 {report['baseline_ms']:.1f} ms, {args.check} {report['backend_ms']:.1f} ms "
+          f"({len(SAMPLE_PAIRS) * 2} texts)")
+    raise SystemExit(0 if report["max_abs_diff"] <= args.tolerance else 1)
@@ -0,0 +1,539 @@
+import io
+import os
+import sys
+import time
+import types
+import atexit
+import zlib
+import zipfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+import metrics
+from cache import DiskLRUCache, content_hash, persistent_dir
+
+# --- EXTRACTION BUDGETS ---
+# Wall-clock seconds one document may spend in extraction before it is abandoned.
+DOCUMENT_TIMEOUT = float(os.environ.get("RESUME_SCANNER_EXTRACT_TIMEOUT", 30))
+# Pages beyond this limit are not extracted (academic CVs rarely need more).
+MAX_PAGES = int(os.environ.get("RESUME_SCANNER_MAX_PAGES", 50))
+# Large documents are split into page ranges of this size and extracted in parallel.
+PAGES_PER_TASK = 8
+# Worker processes (0 = extract in the calling process, without hard timeouts).
+EXTRACT_WORKERS = int(os.environ.get("RESUME_SCANNER_EXTRACT_WORKERS", os.cpu_count() or 1))
+# Uncompressed size limits for ZIP uploads, checked before anything is decompressed, so a
+# small archive that expands to gigabytes (a "ZIP bomb") cannot exhaust the worker's memory.
+ZIP_MAX_MEMBER_BYTES = int(float(os.environ.get("RESUME_SCANNER_ZIP_MAX_MEMBER_MB", 50)) * 2**20)
+ZIP_MAX_TOTAL_BYTES = int(float(os.environ.get("RESUME_SCANNER_ZIP_MAX_TOTAL_MB", 500)) * 2**20)
+
+# --- ERROR CATEGORIES ---
+ENCRYPTED = "encrypted"
+CORRUPT = "corrupt"
+EMPTY = "empty"
+TIMEOUT = "timeout"
+TOO_LARGE = "too_large"
+UNKNOWN = "unknown"
+
+class ExtractionError(Exception):
+    """
+    Raised when a PDF cannot be turned into text.
+    'category' is one of ENCRYPTED, CORRUPT, EMPTY, TIMEOUT, TOO_LARGE or UNKNOWN, so callers can
+    react to the kind of failure instead of matching on the error message.
+    """
+
+    def __init__(self, category: str, message: str = ""):
+        super().__init__(message or category)
+        self.category = category
+
+    def __reduce__(self):
+        # Keep the category when the error is pickled back from a worker process
+        return (ExtractionError, (self.category, str(self)))
+
+# Shared, process-wide cache of extracted text keyed by the SHA-256 of the PDF bytes.
+# Re-uploading the same resume (from any session) skips PyPDF2 parsing entirely.
+# The text only spills to disk when persistence is enabled (RESUME_SCANNER_PERSIST=1).
+extraction_cache = DiskLRUCache(
+    cache_dir=persistent_dir("extraction"),
+    max_items=256,
+    max_disk_items=20_000,
+    max_bytes=64 * 2**20
+)
+metrics.register_collector("extraction_cache", extraction_cache.stats)
+
+def _open_reader(pdf_bytes: bytes):
+    """Opens a PDF, unlocking it when it only has an owner password (empty user password)."""
+    import PyPDF2
+
+    if not pdf_bytes:
+        raise ExtractionError(EMPTY, "The file contains no data.")
+
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    if reader.is_encrypted:
+        try:
+            unlocked = reader.decrypt("")
+        except Exception:
+            unlocked = 0
+        if not unlocked:
+            raise ExtractionError(ENCRYPTED, "The file is password protected.")
+    return reader
+
+@contextmanager
+def _categorized_errors():
+    """Re-raises every failure inside the block as a categorized ExtractionError."""
+    # PyPDF2 is imported lazily so that importing this module stays cheap at app start-up
+    from PyPDF2.errors import (DependencyError, EmptyFileError, FileNotDecryptedError,
+                               PdfReadError, WrongPasswordError)
+
+    try:
+        yield
+    except ExtractionError:
+        raise
+    except EmptyFileError as e:
+        raise ExtractionError(EMPTY, str(e))
+    except (FileNotDecryptedError, WrongPasswordError, DependencyError) as e:
+        # DependencyError: AES-encrypted files that need an extra crypto library to open
+        raise ExtractionError(ENCRYPTED, str(e))
+    except PdfReadError as e:
+        raise ExtractionError(CORRUPT, str(e))
+    except Exception as e:
+        raise ExtractionError(UNKNOWN, str(e))
+
+def _open_pages(pdf_bytes: bytes):
+    """Opens the PDF and returns (reader, total_pages); a document without pages is EMPTY."""
+    reader = _open_reader(pdf_bytes)
+    total_pages = len(reader.pages)
+    if total_pages == 0:
+        raise ExtractionError(EMPTY, "The PDF has no pages.")
+    return reader, total_pages
+
+def extract_page_range(pdf_bytes: bytes, start: int, stop: int, deadline: float = None):
+    """
+    Extracts the text of pages [start, stop) and returns (page_texts, total_pages).
+    This is the unit of work executed by the worker processes. The 'deadline'
+    (a time.time() timestamp) is checked between pages so slow documents stop early.
+    Every failure is raised as a categorized ExtractionError.
+    """
+    with _categorized_errors():
+        reader, total_pages = _open_pages(pdf_bytes)
+
+        page_texts = []
+        for index in range(start, min(stop, total_pages)):
+            if deadline is not None and time.time() > deadline:
+                raise ExtractionError(TIMEOUT, "Extraction exceeded the time budget.")
+            page_texts.append(reader.pages[index].extract_text())
+        return page_texts, total_pages
+
+def iter_pages(pdf_bytes: bytes, max_pages: int = MAX_PAGES, timeout: float = DOCUMENT_TIMEOUT):
+    """
+    Streaming extraction in the calling process: yields (page_index, page_text, total_pages)
+    one page at a time, so each page can be processed (and released) before the next one
+    is parsed. The time budget is checked between pages; errors are categorized like
+    extract_page_range(). Closing the generator early stops the extraction.
+
+    Only time spent parsing counts against 'timeout', not the time the caller spends
+    on a page between two yields.
+    """
+    with _categorized_errors():
+        start = time.perf_counter()
+        reader, total_pages = _open_pages(pdf_bytes)
+        spent = time.perf_counter() - start
+
+        for index in range(min(max_pages, total_pages)):
+            if timeout and spent > timeout:
+                raise ExtractionError(TIMEOUT, "Extraction exceeded the time budget.")
+            start = time.perf_counter()
+            text = reader.pages[index].extract_text()
+            spent += time.perf_counter() - start
+            yield index, text, total_pages
+
+def _ping(_):
+    # No-op task used to block until a freshly started worker is ready
+    return os.getpid()
+
+def _join_pages(page_texts):
+    # Pages are separated by a blank line, like the original single-file extraction loop
+    return "".join(text + "\n\n" for text in page_texts)
+
+def _cache_entry(page_texts, total_pages) -> dict:
+    """The extraction cache value: the joined text, the page count and where each page's text ends."""
+    page_ends, offset = [], 0
+    for text in page_texts:
+        offset += len(text)
+        page_ends.append(offset)
+        offset += 2
+    return {"text": _join_pages(page_texts), "pages": total_pages, "page_ends": page_ends}
+
+def read_pdf(pdf_bytes: bytes, max_pages: int = MAX_PAGES, timeout: float = DOCUMENT_TIMEOUT):
+    """
+    Extracts the raw text of a PDF document held in memory, in the calling process.
+    Returns a (text, total_pages) tuple so callers can build the same
+    page-count feedback the single-resume view shows.
+    """
+    deadline = time.time() + timeout if timeout else None
+    page_texts, total_pages = extract_page_range(pdf_bytes, 0, max_pages, deadline)
+    return _join_pages(page_texts), total_pages
+
+@contextmanager
+def _main_module_hidden():
+    """
+    Spawned workers normally re-import the parent's __main__ module. Under Streamlit,
+    __main__ is app.py itself, so every worker would re-run the whole app (and load the
+    SBERT model). Workers only need this module, so __main__ is swapped for an empty
+    module while they are being started.
+    """
+    main_module = sys.modules.get("__main__")
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        if main_module is not None:
+            sys.modules["__main__"] = main_module
+
+class ExtractionPool:
+    """
+    Parallel PDF extraction on a pool of worker processes.
+
+    - Across files: Up to 'workers' documents are extracted at the same time.
+    - Across pages: Documents longer than 'pages_per_task' are split into page ranges
+      that run on different workers and are stitched back together in order.
+    - Budgets: Each document gets 'timeout' seconds of wall-clock time (checked by the
+      worker between pages) and at most 'max_pages' pages. A worker stuck inside a
+      single page is killed: the pool is restarted and unaffected tasks are resubmitted.
+
+    extract_many() never raises for a bad document; its slot holds an ExtractionError.
+    iter_pages() streams one document page by page under the same budgets.
+    """
+
+    # Extra seconds the parent waits for the worker's own deadline check before killing it
+    KILL_GRACE = 1.0
+
+    def __init__(self, workers: int = EXTRACT_WORKERS, timeout: float = DOCUMENT_TIMEOUT,
+                 max_pages: int = MAX_PAGES, pages_per_task: int = PAGES_PER_TASK):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.pages_per_task = pages_per_task
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # 'spawn' is safe to use from Streamlit's threads (no forked locks)
+                context = multiprocessing.get_context("spawn")
+                with _main_module_hidden():
+                    self._pool = context.Pool(self.workers)
+                # Wait until every worker has started, so process start-up time is never
+                # charged against a document's time budget
+                self._pool.map(_ping, range(self.workers), chunksize=1)
+            return self._pool, self._generation
+
+    def _restart(self, generation: int):
+        """Kills every worker (including a stuck one). Tasks of other callers get resubmitted."""
+        with self._lock:
+            if self._generation != generation or self._pool is None:
+                return  # Another thread already restarted the pool
+            self._pool.terminate()
+            self._pool = None
+            self._generation += 1
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+    def _submit(self, task, pdf_bytes, restart_clock: bool = False):
+        pool, generation = self._get_pool()
+        if restart_clock:
+            # Start the document's time budget only once a (warm) pool is available
+            task["deadline"] = time.time() + self.timeout
+        task["generation"] = generation
+        task["result"] = pool.apply_async(
+            extract_page_range, (pdf_bytes, task["start"], task["stop"], task["deadline"])
+        )
+
+    def extract_many(self, documents):
+        """
+        Extracts a list of PDF byte strings.
+        Returns a list aligned with 'documents': (page_texts, total_pages) or ExtractionError.
+        """
+        results = [None] * len(documents)
+        page_chunks = [{} for _ in documents]
+        totals = [0] * len(documents)
+        waiting = list(range(len(documents)))[::-1]
+        tasks, active_docs = [], set()
+
+        while waiting or tasks:
+            # 1. Keep at most 'workers' documents in flight so deadlines measure work, not queueing
+            while waiting and len(active_docs) < self.workers:
+                doc = waiting.pop()
+                active_docs.add(doc)
+                # The first task also reports the page count used to plan the remaining ranges
+                first = {"doc": doc, "start": 0, "stop": self.pages_per_task}
+                tasks.append(first)
+                self._submit(first, documents[doc], restart_clock=True)
+
+            progressed, stuck_generation = False, None
+            for task in list(tasks):
+                doc = task["doc"]
+                if results[doc] is not None:
+                    tasks.remove(task)
+                    continue
+
+                if task["result"].ready():
+                    tasks.remove(task)
+                    progressed = True
+                    try:
+                        page_texts, total_pages = task["result"].get()
+                    except ExtractionError as e:
+                        results[doc] = e
+                        continue
+                    except Exception as e:
+                        results[doc] = ExtractionError(UNKNOWN, str(e))
+                        continue
+
+                    page_chunks[doc][task["start"]] = page_texts
+                    if task["start"] == 0:
+                        totals[doc] = total_pages
+                        limit = min(total_pages, self.max_pages)
+                        for start in range(self.pages_per_task, limit, self.pages_per_task):
+                            rest = {"doc": doc, "start": start, "deadline": task["deadline"],
+                                    "stop": min(start + self.pages_per_task, limit)}
+                            tasks.append(rest)
+                            self._submit(rest, documents[doc])
+
+                elif task["generation"] != self._generation:
+                    # The pool was restarted (by us or another session): run the task again
+                    self._submit(task, documents[doc], restart_clock=True)
+
+                elif time.time() > task["deadline"] + self.KILL_GRACE:
+                    # The worker ignored its deadline (stuck inside one page): give up on this document
+                    tasks.remove(task)
+                    results[doc] = ExtractionError(TIMEOUT, f"Extraction exceeded {self.timeout:g} seconds.")
+                    stuck_generation = task["generation"]
+
+            if stuck_generation is not None:
+                self._restart(stuck_generation)
+
+            # 2. Documents without pending tasks are finished (or failed)
+            pending_docs = {task["doc"] for task in tasks}
+            for doc in list(active_docs):
+                if doc not in pending_docs:
+                    active_docs.discard(doc)
+                    if results[doc] is None:
+                        ordered = [text for start in sorted(page_chunks[doc]) for text in page_chunks[doc][start]]
+                        results[doc] = (ordered, totals[doc])
+                    page_chunks[doc] = None
+
+            if not progressed:
+                time.sleep(0.005)
+
+        return results
+
+    def iter_pages(self, pdf_bytes: bytes, max_pages: int = None, timeout: float = None):
+        """
+        Streaming extraction on the pool: yields (page_index, page_text, total_pages) in page
+        order. Page 0 is extracted alone, so the first page arrives as early as possible (its
+        task also reports the page count); the rest go in ranges of 'pages_per_task', like in
+        extract_many(), with up to 'workers' ranges in flight. Each range sends and parses the
+        PDF once, so a 30-page document is parsed 5 times instead of once per page.
+        Only time the caller spends waiting for a range counts against 'timeout', not the time
+        it spends on pages between two yields. A worker stuck inside one page is killed (like
+        in extract_many()) and TIMEOUT is raised. Failures raise ExtractionError.
+        Closing the generator stops submitting ranges; ranges already in flight are discarded.
+        """
+        max_pages = self.max_pages if max_pages is None else max_pages
+        timeout = self.timeout if timeout is None else timeout
+        budget = timeout
+        pending = {}
+        index, next_start, limit = 0, 0, 1
+
+        while index < limit:
+            # 1. Keep up to 'workers' page ranges in flight, in page order
+            while next_start < limit and len(pending) < self.workers:
+                stop = 1 if next_start == 0 else min(next_start + self.pages_per_task, limit)
+                pending[next_start] = {"doc": 0, "start": next_start, "stop": stop,
+                                       "deadline": time.time() + budget}
+                self._submit(pending[next_start], pdf_bytes)
+                next_start = stop
+            task = pending.pop(index)
+
+            # 2. Wait for the next range, charging the wait against the budget
+            started = time.perf_counter()
+            while not task["result"].ready():
+                if task["generation"] != self._generation:
+                    # The pool was restarted (by another session): run the range again
+                    task["deadline"] = time.time() + budget
+                    self._submit(task, pdf_bytes)
+                elif time.perf_counter() - started > budget + self.KILL_GRACE:
+                    self._restart(task["generation"])
+                    raise ExtractionError(TIMEOUT, f"Extraction exceeded {timeout:g} seconds.")
+                task["result"].wait(0.05)
+            budget -= time.perf_counter() - started
+
+            try:
+                page_texts, total_pages = task["result"].get()
+            except ExtractionError:
+                raise
+            except Exception as e:
+                raise ExtractionError(UNKNOWN, str(e))
+
+            limit = min(total_pages, max_pages)
+            for text in page_texts:
+                yield index, text, total_pages
+                index += 1
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_extraction_pool():
+    """Returns the process-wide ExtractionPool (created on first use), or None when workers are disabled."""
+    global _shared_pool
+    if EXTRACT_WORKERS <= 0:
+        return None
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ExtractionPool()
+            atexit.register(_shared_pool.close)
+    return _shared_pool
+
+def read_pdfs_cached(documents):
+    """
+    Content-addressed, parallel extraction of many PDFs.
+    Cached documents are answered from the extraction cache; the rest are extracted
+    together on the shared ExtractionPool. Returns a list aligned with 'documents'
+    holding (text, total_pages) tuples or ExtractionError instances.
+    Failed extractions are not cached.
+    """
+    keys = [content_hash(pdf_bytes) for pdf_bytes in documents]
+    results = [None] * len(documents)
+
+    misses = []
+    for i, key in enumerate(keys):
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            results[i] = (cached["text"], cached["pages"])
+        else:
+            misses.append(i)
+
+    if misses:
+        with metrics.timer("pdf_extract"):
+            pool = get_extraction_pool()
+            if pool is None:
+                extracted = []
+                for i in misses:
+                    try:
+                        deadline = time.time() + DOCUMENT_TIMEOUT if DOCUMENT_TIMEOUT else None
+                        extracted.append(extract_page_range(documents[i], 0, MAX_PAGES, deadline))
+                    except ExtractionError as e:
+                        extracted.append(e)
+            else:
+                extracted = pool.extract_many([documents[i] for i in misses])
+
+        for i, result in zip(misses, extracted):
+            if isinstance(result, ExtractionError):
+                results[i] = result
+                metrics.count(f"pdf_failures_{result.category}")
+            else:
+                entry = _cache_entry(*result)
+                results[i] = (entry["text"], entry["pages"])
+                extraction_cache.put(keys[i], entry)
+
+    return results
+
+def read_pdf_cached(pdf_bytes: bytes):
+    """
+    Content-addressed version of read_pdf().
+    The result (text and page count) is looked up by the hash of the uploaded bytes,
+    so identical files are only parsed once. Extraction runs on the worker pool with the
+    per-document time and page budgets; failures raise ExtractionError.
+    """
+    result = read_pdfs_cached([pdf_bytes])[0]
+    if isinstance(result, ExtractionError):
+        raise result
+    return result
+
+def iter_pdf_pages(pdf_bytes: bytes, max_pages: int = MAX_PAGES, timeout: float = DOCUMENT_TIMEOUT):
+    """
+    Content-addressed streaming extraction: yields (page_index, page_text, total_pages).
+    A cached document is answered page by page from the extraction cache. Otherwise the
+    pages are extracted on the shared ExtractionPool (with its time budget and stuck-worker
+    kill) or, with workers disabled, in the calling process. A document read completely
+    within the standard page budget is cached like read_pdf_cached() would cache it.
+    Failures raise ExtractionError.
+    """
+    key = content_hash(pdf_bytes)
+    cached = extraction_cache.get(key)
+    if cached is not None and "page_ends" in cached:
+        text, page_ends = cached["text"], cached["page_ends"]
+        start = 0
+        for index, end in enumerate(page_ends[:max_pages]):
+            yield index, text[start:end], cached["pages"]
+            start = end + 2
+        return
+
+    pool = get_extraction_pool()
+    pages = pool.iter_pages(pdf_bytes, max_pages, timeout) if pool is not None else \
+        iter_pages(pdf_bytes, max_pages, timeout)
+    page_texts, total_pages = [], 0
+    try:
+        for index, text, total_pages in pages:
+            page_texts.append(text)
+            yield index, text, total_pages
+    except ExtractionError as e:
+        metrics.count(f"pdf_failures_{e.category}")
+        raise
+
+    if len(page_texts) == min(total_pages, MAX_PAGES):
+        extraction_cache.put(key, _cache_entry(page_texts, total_pages))
+
+def iter_uploaded_pdfs(uploaded_files):
+    """
+    Expands a list of uploaded files into (file_name, pdf_bytes) pairs.
+    Plain PDFs are yielded as-is, while ZIP archives are opened and every
+    PDF inside them (including sub-folders) is yielded individually.
+    An archive (or archive member) that cannot be read is yielded as
+    (file_name, ExtractionError) instead, so one bad upload does not abort the batch.
+    Members larger than ZIP_MAX_MEMBER_BYTES, or beyond ZIP_MAX_TOTAL_BYTES for the whole
+    archive, are reported as TOO_LARGE without being decompressed.
+    """
+    for uploaded in uploaded_files:
+        name = uploaded.name
+        data = uploaded.getvalue()
+
+        if name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile as e:
+                yield name, ExtractionError(CORRUPT, f"Not a valid ZIP archive: {e}")
+                continue
+            with archive:
+                total = 0
+                for member in archive.infolist():
+                    # Skip folders and hidden macOS metadata (e.g., '__MACOSX/._cv.pdf')
+                    if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                        continue
+                    if "__MACOSX" in member.filename:
+                        continue
+                    # 'file_size' comes from the archive header; zipfile never returns more bytes than that
+                    if member.file_size > ZIP_MAX_MEMBER_BYTES:
+                        yield f"{name}/{member.filename}", ExtractionError(
+                            TOO_LARGE, f"Larger than {ZIP_MAX_MEMBER_BYTES // 2**20} MB once uncompressed.")
+                        continue
+                    if total + member.file_size > ZIP_MAX_TOTAL_BYTES:
+                        yield f"{name}/{member.filename}", ExtractionError(
+                            TOO_LARGE, f"The archive exceeds {ZIP_MAX_TOTAL_BYTES // 2**20} MB once uncompressed.")
+                        continue
+                    total += member.file_size
+                    try:
+                        yield f"{name}/{member.filename}", archive.read(member)
+                    except RuntimeError as e:
+                        # Password-protected archive member
+                        yield f"{name}/{member.filename}", ExtractionError(ENCRYPTED, str(e))
+                    except (zipfile.BadZipFile, zlib.error, NotImplementedError, EOFError) as e:
+                        # Damaged entry (bad CRC, truncated data) or an unsupported compression method
+                        yield f"{name}/{member.filename}", ExtractionError(CORRUPT, str(e))
+        elif name.lower().endswith(".pdf"):
+            yield name, data
@@ -1,8 +1,13 @@
+import os
 import streamlit as st
-from collections import Counter
-from sentence_transformers import SentenceTransformer
-import nltk, re
-from nltk.corpus import stopwords
+import metrics
+from embeddings import EmbeddingStore
+from service import EmbeddingService
+from vector_index import ResumeIndex
+from sessions import SessionManager
+from encoder import MODEL_NAME, cache_name, get_model, warm_up
+# Re-exported so the app keeps a single import point for its helpers
+from preprocessing import clean_text
 
 def init_state():
     """
@@ -14,10 +19,23 @@ def init_state():
     if "info" not in st.session_state:
         st.session_state.info = ""
     
-    # Initialize 'cv_text' to store the extracted text from the PDF
+    # Initialize 'cv_text' to store the handle of the extracted text from the PDF
+    # (the text itself lives in the shared artifact store, see put_artifact())
     if "cv_text" not in st.session_state:
         st.session_state.cv_text = ""
 
+    # Initialize 'stream' to hold the page-by-page progress of a Streaming Mode analysis
+    if "stream" not in st.session_state:
+        st.session_state.stream = None
+
+    # Mark this session as active, so its artifacts are not evicted as idle
+    load_session_manager().touch(_session_id())
+
+    # The session was idle for longer than the TTL and its artifacts were released: start over
+    if st.session_state.cv_text and get_artifact("cv_text") is None:
+        clear_cv()
+        st.toast("⌛ Your previous analysis expired after a period of inactivity. Please run it again.")
+
 def clear_cv():
     """
     Callback function to reset the stored CV data.
@@ -26,25 +44,46 @@ def clear_cv():
     """
     # Reset the info message
     st.session_state.info = ""
-    # Clear the extracted CV text
-    st.session_state.cv_text = ""
+    # Clear the extracted CV text (and release it in the shared store)
+    drop_artifact("cv_text")
+    # Drop any (partial) Streaming Mode progress of the previous file
+    st.session_state.stream = None
 
-def clean_text(text: str):
+@st.cache_resource
+def load_session_manager():
     """
-    Preprocesses text to ensure continuous sentences for AI/NLP models.
-    Removes artifacts from PDF extraction and JSON formatting.
+    Creates the process-wide SessionManager (see sessions.py), once per process.
+
+    Large per-session values (the extracted CV text, the batch ranking) are kept in its
+    shared, size-bounded store, deduplicated by content hash; session state only holds
+    their handles. Sessions idle for longer than RESUME_SCANNER_SESSION_TTL release their
+    artifacts (checked by a background sweeper), so memory stays flat over the day.
     """
-    # 1. Handle escaped newlines (common in JSON/API raw inputs)
-    text = text.replace("\\n", " ")
-    
-    # 2. Replace actual newlines with spaces
-    # Prevents words from sticking together or breaking context (e.g., "AI\nEngineer" -> "AI Engineer")
-    text = text.replace("\n", " ")
-    
-    # 3. Collapse multiple whitespaces into a single space & trim edges
-    text = re.sub(r"\s+", " ", text).strip()
+    manager = SessionManager()
+    manager.start_sweeper()
+    metrics.register_collector("sessions", manager.report)
+    return manager
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-    return text 
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+def put_artifact(name: str, value):
+    """Stores a large value in the shared store and keeps only its handle in st.session_state[name]."""
+    st.session_state[name] = load_session_manager().put(_session_id(), name, value)
+
+def get_artifact(name: str):
+    """The value behind the handle st.session_state[name], or None (never set, dropped or expired)."""
+    if not st.session_state.get(name):
+        return None
+    return load_session_manager().get(_session_id(), name)
+
+def drop_artifact(name: str):
+    """Releases the session's artifact 'name' and clears its handle."""
+    load_session_manager().drop(_session_id(), name)
+    st.session_state[name] = ""
 
 @st.cache_resource
 def load_model():
@@ -55,20 +94,62 @@ def load_model():
     This decorator is crucial. It tells Streamlit to load this heavy model 
     ONLY ONCE and cache it in memory. Without this, the app would reload 
     the model (taking several seconds) every time the user clicks a button.
+    """
+    # get_model() shares the instance with the background warm-up thread (if enabled).
+    # The inference backend (fp32 / int8 / ONNX) comes from RESUME_SCANNER_BACKEND.
+    return get_model(MODEL_NAME)
 
-    It also performs a one-time check for NLTK stopwords. Placing this here 
-    ensures that the necessary data is downloaded exactly once at startup, 
-    preventing redundant checks during app usage.
-    """
-    # --- NLTK ONE-TIME SETUP ---
-    # Check if 'stopwords' data is already available locally.
-    # If not found (LookupError), download it immediately.
-    # We place this inside @st.cache_resource so it runs only once per session,
-    # preventing repetitive download checks on every interaction.
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords')
-
-    # Using 'paraphrase-multilingual-MiniLM-L12-v2' for good performance across languages
-    return SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
\ No newline at end of file
+@st.cache_resource
+def load_embedding_store():
+    """
+    Wraps the cached SBERT model in an EmbeddingStore.
+    
+    The store is shared by all sessions of this process, so a Job Description that 
+    was already embedded (by anyone, or before a restart with RESUME_SCANNER_PERSIST=1)
+    is read from the cache instead of running the model again. Widget changes that trigger
+    a rerun (e.g., editing the Critical Skills) therefore cost no forward pass.
+    """
+    # Keyed by model AND backend, so int8/ONNX vectors never mix with fp32 ones
+    store = EmbeddingStore(load_model(), cache_name(MODEL_NAME))
+    metrics.register_collector("embedding_cache", store.stats)
+    return store
+
+@st.cache_resource
+def load_embedding_service():
+    """
+    Puts the micro-batching EmbeddingService in front of the shared embedding store.
+
+    Concurrent sessions no longer run one small forward pass each: their encode requests
+    are queued for a few milliseconds and run as one batched call (see service.py).
+    Like the store, it is created once per process and shared by every session.
+    """
+    service = EmbeddingService(load_embedding_store())
+    metrics.register_collector("embedding_service", service.stats)
+    return service
+
+@st.cache_resource
+def load_resume_index():
+    """
+    Opens the index of scanned resumes (see vector_index.py) for the current model: on disk
+    with RESUME_SCANNER_PERSIST=1, otherwise in memory for the life of the process.
+
+    Resumes ranked in Batch Mode are added to it when the user opts in, so a Job Description can
+    later be matched against every resume in the pool. In memory it keeps the newest
+    RESUME_SCANNER_POOL_MAX_RESUMES resumes. One instance per process, shared by every session.
+    """
+    index = ResumeIndex.open(load_embedding_store())
+    metrics.register_collector("resume_index", index.stats)
+    return index
+
+@st.cache_resource
+def start_model_warm_up():
+    """
+    Optionally starts loading the SBERT model on a background thread, once per process.
+    
+    Enabled with the environment variable RESUME_SCANNER_WARMUP=1. It is off by default:
+    the page renders without waiting for the model either way, and the model is loaded
+    lazily the first time a Flexible/Chunked score (or a batch ranking) is requested.
+    """
+    if os.environ.get("RESUME_SCANNER_WARMUP", "0") == "1":
+        return warm_up(MODEL_NAME)
+    return None
@@ -0,0 +1,193 @@
+"""
+Corpus-level IDF table, built offline from a local archive of Job Descriptions.
+
+Boilerplate words that appear in almost every posting ("team", "experience", "company")
+get a low IDF and stop crowding real skills out of the Critical Skills ranking.
+
+Build the table once (streams the archive; memory stays constant no matter its size):
+
+    python idf.py build archive/ more_postings.jsonl --output idf_table.npy
+
+and point the app at it:
+
+    RESUME_SCANNER_IDF_TABLE=idf_table.npy streamlit run app.py
+
+Document frequencies are counted in a fixed number of hashed buckets (the hashing trick,
+same hash as scikit-learn's HashingVectorizer), so no vocabulary is ever held in memory.
+The table is a float32 .npy file plus a small .json sidecar; it is opened as a memory
+map, so loading is instant and replicas on one node share its pages.
+"""
+import os
+import sys
+import gzip
+import json
+import argparse
+import numpy as np
+from cache import content_hash
+from preprocessing import clean_texts
+from startup import timed
+
+IDF_TABLE_PATH = os.environ.get("RESUME_SCANNER_IDF_TABLE")
+# 2^20 buckets = 4 MB of float32 IDF values, with few collisions for job-posting vocabularies
+DEFAULT_FEATURES = 2 ** 20
+TABLE_VERSION = 1
+
+def _hashing_vectorizer(n_features: int):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Binary counts: a document adds at most 1 to the frequency of each of its terms
+    return HashingVectorizer(n_features=n_features, stop_words="english", alternate_sign=False,
+                             binary=True, norm=None)
+
+def term_buckets(terms, n_features: int) -> np.ndarray:
+    """Bucket of each term, identical to the column HashingVectorizer assigns it."""
+    from sklearn.utils import murmurhash3_32
+
+    buckets = np.empty(len(terms), dtype=np.int64)
+    for i, term in enumerate(terms):
+        h = murmurhash3_32(term, seed=0)
+        # HashingVectorizer maps the one value without a positive counterpart like this, too
+        buckets[i] = (2 ** 31 if h == -2 ** 31 else abs(h)) % n_features
+    return buckets
+
+class IDFTable:
+    """
+    A memory-mapped, read-only IDF table. Drop-in for jd_profile.CorpusIDF:
+    it exposes lookup(terms) and a 'fingerprint' identifying the table's contents.
+    """
+
+    def __init__(self, path: str):
+        with open(_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != TABLE_VERSION:
+            raise ValueError(f"Unsupported IDF table version in {path}: {meta.get('version')}")
+
+        self.path = path
+        self.n_documents = meta["n_documents"]
+        self.n_features = meta["n_features"]
+        self.fingerprint = meta["fingerprint"]
+        self.idf = np.load(path, mmap_mode="r")
+
+    def lookup(self, terms) -> np.ndarray:
+        """IDF weight of every term, in the given order (one memmap gather, no fit)."""
+        return np.asarray(self.idf[term_buckets(terms, self.n_features)], dtype=np.float64)
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+def iter_documents(sources, field: str = "description"):
+    """
+    Streams documents from files and folders:
+    - .jsonl / .jsonl.gz: one JSON object per line; the text is in 'field' (or "text").
+    - .txt / .md (optionally .gz): one document per file.
+    - Folders are searched recursively (sorted, so runs are reproducible).
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                yield from iter_documents([os.path.join(root, name) for name in sorted(files)], field)
+            continue
+
+        name = source.lower()
+        opener = gzip.open if name.endswith(".gz") else open
+        name = name[:-3] if name.endswith(".gz") else name
+
+        if name.endswith(".jsonl"):
+            with opener(source, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        text = record.get(field) or record.get("text")
+                        if text:
+                            yield text
+        elif name.endswith((".txt", ".md")):
+            with opener(source, "rt", encoding="utf-8", errors="replace") as f:
+                yield f.read()
+
+def build_idf_table(documents, output: str, n_features: int = DEFAULT_FEATURES, batch_size: int = 1000,
+                    progress=None):
+    """
+    Counts document frequencies over an iterable of texts and writes the IDF table to 'output'.
+    Documents are processed in batches of 'batch_size'; memory is one counter per bucket.
+    Uses scikit-learn's smoothed formula: idf = ln((1 + n) / (1 + df)) + 1.
+    Returns the number of documents read.
+    """
+    vectorizer = _hashing_vectorizer(n_features)
+    df = np.zeros(n_features, dtype=np.int64)
+    n_documents = 0
+
+    batch = []
+    for text in documents:
+        batch.append(text)
+        if len(batch) == batch_size:
+            df += np.bincount(vectorizer.transform(clean_texts(batch)).indices, minlength=n_features)
+            n_documents += len(batch)
+            batch = []
+            if progress:
+                progress(n_documents)
+    if batch:
+        df += np.bincount(vectorizer.transform(clean_texts(batch)).indices, minlength=n_features)
+        n_documents += len(batch)
+    if n_documents == 0:
+        raise ValueError("The archive contains no documents.")
+
+    idf = (np.log((1 + n_documents) / (1 + df)) + 1).astype(np.float32)
+
+    # Both files are replaced atomically; the .json sidecar goes last, because a table
+    # without it cannot be loaded
+    meta = {
+        "version": TABLE_VERSION,
+        "n_documents": n_documents,
+        "n_features": n_features,
+        "fingerprint": content_hash(idf.tobytes())[:16],
+    }
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, idf)
+    os.replace(tmp_path, output)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, _meta_path(output))
+    return n_documents
+
+def load_default_table():
+    """The table named by RESUME_SCANNER_IDF_TABLE, or None when unset or unreadable."""
+    if not IDF_TABLE_PATH:
+        return None
+    try:
+        with timed("load IDF table"):
+            return IDFTable(IDF_TABLE_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring IDF table {IDF_TABLE_PATH}: {e}", file=sys.stderr)
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect a corpus IDF table for Resume Scanner Pro.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Stream a JD archive and write the IDF table.")
+    build.add_argument("sources", nargs="+", help="Folders, .txt/.md files or .jsonl files (optionally gzipped).")
+    build.add_argument("--output", "-o", default="idf_table.npy", help="Output table (.npy; a .json sidecar is written next to it).")
+    build.add_argument("--field", default="description", help="JSON field holding the JD text in .jsonl files.")
+    build.add_argument("--n-features", type=int, default=DEFAULT_FEATURES, help="Number of hash buckets.")
+    build.add_argument("--batch-size", type=int, default=1000, help="Documents vectorized per step.")
+
+    show = commands.add_parser("show", help="Print the IDF of some terms.")
+    show.add_argument("table", help="Path of an IDF table (.npy).")
+    show.add_argument("terms", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        n = build_idf_table(
+            iter_documents(args.sources, args.field), args.output, args.n_features, args.batch_size,
+            progress=lambda count: print(f"Counted {count} document(s)...", file=sys.stderr)
+        )
+        print(f"Wrote {args.output} from {n} document(s).")
+    else:
+        table = IDFTable(args.table)
+        for term, weight in zip(args.terms, table.lookup([term.lower() for term in args.terms])):
+            print(f"{term:<30}{weight:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Job Description profiles: everything needed to score CVs against one posting, fitted once.
+
+A JobProfile holds the JD text and vocabulary, the reference-corpus IDF weight of each term, the
+normalized JD TF-IDF vector, the keyword priority list and (once requested) the JD
+embeddings. It is memoized in memory (and saved to disk with RESUME_SCANNER_PERSIST=1), so
+every later CV, rerun, user or restart only pays one CountVectorizer transform plus a sparse
+dot product:
+
+    profile = get_job_profile(job_description)
+    profile.score(cv_text)            # Strict (TF-IDF) score
+    profile.score_many(cv_texts)      # One transform for a whole batch
+    profile.embedding(encoder)        # JD embedding, computed once per model
+
+Without a reference corpus every term has the same IDF, which reproduces the original
+single-document TfidfVectorizer scores exactly. With one (an offline idf.IDFTable set via
+RESUME_SCANNER_IDF_TABLE, or an in-memory CorpusIDF), boilerplate terms that appear in
+most postings are down-weighted in the score and the priority list.
+"""
+import os
+import json
+import threading
+import numpy as np
+import metrics
+from cache import LRUCache, content_hash, evict_oldest, persistent_dir
+from idf import load_default_table
+
+PROFILE_VERSION = 1
+
+def top_k(weights, k: int) -> np.ndarray:
+    """
+    Indices of the 'k' largest weights, largest first, via a partial selection (argpartition)
+    instead of a full sort. Ties keep index order, so the result equals the first 'k'
+    entries of a stable descending argsort.
+    """
+    weights = np.asarray(weights)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= len(weights):
+        return np.argsort(-weights, kind="stable")
+
+    kth = weights[np.argpartition(-weights, k - 1)[k - 1]]
+    above = np.flatnonzero(weights > kth)
+    ties = np.flatnonzero(weights == kth)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.argsort(-weights[candidates], kind="stable")]
+
+class CorpusIDF:
+    """
+    Smoothed IDF weights from a reference corpus of documents (e.g., past Job Descriptions),
+    using the same formula as scikit-learn: idf = ln((1 + n) / (1 + df)) + 1.
+    Terms never seen in the corpus get the highest possible weight (df = 0).
+    """
+
+    def __init__(self, terms, document_frequencies, n_documents: int):
+        self.n_documents = n_documents
+        df = np.asarray(document_frequencies, dtype=np.float64)
+        self.idf = dict(zip(terms, np.log((1 + n_documents) / (1 + df)) + 1))
+        self.default = float(np.log(1 + n_documents) + 1)
+        self.fingerprint = content_hash(json.dumps([n_documents, sorted(self.idf.items())]))[:16]
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Counts document frequencies over an iterable of texts (with the English stop word list)."""
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        vectorizer = CountVectorizer(stop_words="english", binary=True)
+        counts = vectorizer.fit_transform(documents)
+        return cls(vectorizer.get_feature_names_out(), np.asarray(counts.sum(axis=0)).ravel(), counts.shape[0])
+
+    def lookup(self, terms) -> np.ndarray:
+        """IDF weight of every term, in the given order."""
+        return np.array([self.idf.get(term, self.default) for term in terms], dtype=np.float64)
+
+class JobProfile:
+    """
+    A fitted Job Description. Build it with build_job_profile() / get_job_profile();
+    the constructor only assembles already computed parts (e.g., when loading from disk).
+    Profiles are shared between sessions, so their arrays are read-only.
+    """
+
+    def __init__(self, text: str, keywords, idf, jd_weights, idf_fingerprint: str = None, embeddings=None):
+        self.text = text
+        self.jd_hash = content_hash(text)
+        self.keywords = np.asarray(keywords)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        # L2-normalized TF-IDF vector of the JD over its own vocabulary (every entry > 0)
+        self.jd_weights = np.asarray(jd_weights, dtype=np.float64)
+        self.idf_fingerprint = idf_fingerprint
+        self.embeddings = dict(embeddings or {})
+        for array in (self.keywords, self.idf, self.jd_weights):
+            array.setflags(write=False)
+
+        self._counter = None
+        self._priority = None
+        self._lock = threading.Lock()
+
+    # --- KEYWORD PRIORITY ---
+    @property
+    def priority(self) -> tuple:
+        """
+        Every keyword sorted by JD weight, most important first (ties in alphabetical order).
+        Sorted on first access only: scoring paths that never list keywords skip the sort.
+        """
+        if self._priority is None:
+            self._priority = tuple(self.keywords[top_k(self.jd_weights, len(self.jd_weights))].tolist())
+        return self._priority
+
+    def top_keywords(self, k: int) -> list:
+        """The 'k' most important keywords (same order as priority[:k], without sorting the whole vocabulary)."""
+        if self._priority is not None:
+            return list(self._priority[:k])
+        return self.keywords[top_k(self.jd_weights, k)].tolist()
+
+    # --- SPARSE SCORING ---
+    def _count_vectorizer(self):
+        # A fixed vocabulary needs no fit: building it is only a dict construction
+        if self._counter is None:
+            from sklearn.feature_extraction.text import CountVectorizer
+            self._counter = CountVectorizer(vocabulary=self.keywords.tolist())
+        return self._counter
+
+    def transform(self, cv_texts):
+        """L2-normalized TF-IDF vectors (CSR, one row per CV) over the JD vocabulary."""
+        from sklearn.preprocessing import normalize
+
+        counts = self._count_vectorizer().transform(cv_texts).astype(np.float64)
+        return normalize(counts.multiply(self.idf).tocsr())
+
+    def score_many(self, cv_texts) -> np.ndarray:
+        """Strict (TF-IDF cosine) score of every CV: one transform and a sparse dot product."""
+        return self.transform(cv_texts) @ self.jd_weights
+
+    def score(self, cv_text: str) -> float:
+        return float(self.score_many([cv_text])[0])
+
+    # --- EMBEDDINGS ---
+    def embedding(self, encoder, model_name: str = None):
+        """
+        Normalized JD embedding for 'encoder', computed once per model name and saved with the profile.
+        'model_name' defaults to the encoder's own model_name (EmbeddingStore) or its class name.
+        """
+        model_name = model_name or getattr(encoder, "model_name", type(encoder).__name__)
+        vector = self.embeddings.get(model_name)
+        if vector is None:
+            with self._lock:
+                vector = self.embeddings.get(model_name)
+                if vector is None:
+                    vector = np.asarray(encoder.encode(self.text, normalize_embeddings=True), dtype=np.float32)
+                    vector.setflags(write=False)
+                    self.embeddings[model_name] = vector
+                    save_job_profile(self)
+        return vector
+
+    # --- PERSISTENCE ---
+    def to_arrays(self) -> dict:
+        arrays = {"text": np.array(self.text), "keywords": self.keywords.astype(str),
+                  "idf": self.idf, "jd_weights": self.jd_weights}
+        for name, vector in self.embeddings.items():
+            arrays[f"embedding:{name}"] = vector
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, idf_fingerprint: str = None):
+        embeddings = {key.split(":", 1)[1]: arrays[key] for key in arrays if key.startswith("embedding:")}
+        return cls(str(arrays["text"]), arrays["keywords"], arrays["idf"], arrays["jd_weights"],
+                   idf_fingerprint, embeddings)
+
+def build_job_profile(job_description: str, idf=None) -> JobProfile:
+    """
+    Fits a profile for one (cleaned) Job Description.
+    Raises ValueError ("empty vocabulary") when the JD contains only stop words, exactly like TfidfVectorizer.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(stop_words="english")
+    row = vectorizer.fit_transform([job_description]).tocsr()
+    keywords = vectorizer.get_feature_names_out()
+    # Every vocabulary term occurs in the JD, so the sorted CSR data is already the full count vector
+    row.sort_indices()
+    counts = row.data.astype(np.float64)
+
+    # Without a reference corpus every term has the same IDF (what a one-document fit yields)
+    idf_weights = idf.lookup(keywords) if idf is not None else np.ones(len(keywords))
+    jd_weights = counts * idf_weights
+    jd_weights /= np.linalg.norm(jd_weights)
+
+    return JobProfile(job_description, keywords, idf_weights, jd_weights,
+                      idf.fingerprint if idf is not None else None)
+
+# --- PROFILE STORE ---
+# Profiles are small (one float per JD term), so many postings fit in memory; the disk tier
+# lets every replica and restart skip the fit for postings it has already seen (only with
+# RESUME_SCANNER_PERSIST=1: a profile holds the JD's vocabulary).
+PROFILE_DIR = persistent_dir("profiles")
+# Disk tier bound: beyond it the least recently used profiles are deleted (like DiskLRUCache)
+MAX_DISK_PROFILES = int(os.environ.get("RESUME_SCANNER_MAX_PROFILES", 5000))
+_disk_count = None
+_disk_lock = threading.Lock()
+_profile_cache = LRUCache(max_items=128)
+metrics.register_collector("profile_cache", _profile_cache.stats)
+_UNSET = object()
+_reference_idf = _UNSET
+
+def use_reference_idf(idf=None):
+    """
+    Sets the reference-corpus IDF used by get_job_profile(): a CorpusIDF, an idf.IDFTable,
+    or None for uniform weights (the single-document behaviour).
+    """
+    global _reference_idf
+    _reference_idf = idf
+
+def reference_idf():
+    """
+    The reference IDF in use. Unless use_reference_idf() was called, this is the offline
+    table named by RESUME_SCANNER_IDF_TABLE (memory-mapped on first use; see idf.py), if any.
+    """
+    global _reference_idf
+    if _reference_idf is _UNSET:
+        _reference_idf = load_default_table()
+    return _reference_idf
+
+def _profile_path(jd_hash: str, idf_fingerprint: str):
+    name = jd_hash if idf_fingerprint is None else f"{jd_hash}-{idf_fingerprint}"
+    return os.path.join(PROFILE_DIR, f"{name}.npz")
+
+def save_job_profile(profile: JobProfile):
+    """Writes the profile to the disk tier (atomically). Failures only disable persistence."""
+    if PROFILE_DIR is None:
+        return
+    global _disk_count
+    path = _profile_path(profile.jd_hash, profile.idf_fingerprint)
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        is_new = not os.path.exists(path)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=np.array(PROFILE_VERSION), **profile.to_arrays())
+        os.replace(tmp_path, path)
+
+        if is_new:
+            with _disk_lock:
+                if _disk_count is None:
+                    _disk_count = sum(1 for name in os.listdir(PROFILE_DIR) if name.endswith(".npz"))
+                else:
+                    _disk_count += 1
+                if _disk_count > MAX_DISK_PROFILES:
+                    _disk_count = evict_oldest(PROFILE_DIR, ".npz", MAX_DISK_PROFILES)
+    except OSError:
+        pass
+
+def _load_job_profile(jd_hash: str, idf_fingerprint: str):
+    if PROFILE_DIR is None:
+        return None
+    path = _profile_path(jd_hash, idf_fingerprint)
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays["version"]) != PROFILE_VERSION:
+                return None
+            profile = JobProfile.from_arrays({key: arrays[key] for key in arrays.files}, idf_fingerprint)
+        try:
+            # Refresh the modification time so the file counts as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return profile
+    except (OSError, KeyError, ValueError):
+        return None
+
+def get_job_profile(job_description: str, idf=None) -> JobProfile:
+    """
+    Returns the profile of a (cleaned) Job Description: from memory, from disk, or fitted now.
+    'idf' defaults to reference_idf() (the configured corpus IDF table, if any).
+    """
+    idf = idf if idf is not None else reference_idf()
+    jd_hash = content_hash(job_description)
+    fingerprint = idf.fingerprint if idf is not None else None
+    key = (jd_hash, fingerprint)
+
+    profile = _profile_cache.get(key)
+    if profile is None:
+        profile = _load_job_profile(jd_hash, fingerprint)
+        if profile is None:
+            with metrics.timer("tfidf_fit"):
+                profile = build_job_profile(job_description, idf)
+            save_job_profile(profile)
+        _profile_cache.put(key, profile)
+    return profile
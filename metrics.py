@@ -0,0 +1,231 @@
+"""
+Hot-path instrumentation for Resume Scanner Pro.
+
+Stages are wrapped with timer() and events with count():
+
+    with metrics.timer("tfidf_fit"):
+        ...
+    metrics.count("extraction_failures")
+
+Enable it with RESUME_SCANNER_METRICS=1. When disabled (the default), timer() returns a
+shared no-op context manager and count() returns immediately, so the instrumentation
+costs one function call per stage.
+
+When enabled, the data is available:
+- In the app's sidebar ("📈 Performance" expander).
+- As Prometheus text or JSONL: set RESUME_SCANNER_METRICS_FILE to a path ending in
+  ".prom" (rewritten atomically, e.g. for node_exporter's textfile collector) or
+  ".jsonl" (one snapshot appended per interval). RESUME_SCANNER_METRICS_INTERVAL sets
+  the export period in seconds (default 15).
+
+Cache hit rates and memory are gauges: collectors registered with register_collector()
+are read at snapshot time, so they cost nothing on the hot path.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("RESUME_SCANNER_METRICS", "0") == "1"
+METRICS_FILE = os.environ.get("RESUME_SCANNER_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("RESUME_SCANNER_METRICS_INTERVAL", 15))
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_timings = {}
+_counters = {}
+_collectors = {}
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+# --- RECORDING ---
+def timer(stage: str):
+    """Context manager that records the duration of the wrapped block under 'stage'."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(stage)
+
+def observe(stage: str, seconds: float):
+    """Records one duration (in seconds) for 'stage'."""
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _timings.get(stage)
+        if histogram is None:
+            histogram = _timings[stage] = _Histogram()
+        histogram.observe(seconds)
+
+def count(name: str, value: int = 1):
+    """Increments the counter 'name'."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def register_collector(name: str, collect):
+    """
+    Registers a function returning a dict of numbers (e.g., a cache's stats()).
+    Each entry is exported as the gauge '<name>_<key>' whenever a snapshot is taken.
+    """
+    _collectors[name] = collect
+
+def collect(name: str):
+    """The current values of a registered collector, or None when it is not registered (yet)."""
+    collect = _collectors.get(name)
+    return collect() if collect is not None else None
+
+# --- MEMORY ---
+def rss_bytes():
+    """Current resident set size of this process (None where it cannot be read)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Peak, not current, RSS on platforms without /proc (bytes on macOS, KB elsewhere)
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+def model_memory_bytes(model) -> int:
+    """
+    Bytes held by a PyTorch model's parameters and buffers (including int8 packed weights).
+    Returns 0 for non-PyTorch encoders (e.g., ONNX Runtime); see the 'model_load_rss' gauge instead.
+    """
+    state_dict = getattr(model, "state_dict", None)
+    if state_dict is None:
+        return 0
+
+    def nbytes(value):
+        if isinstance(value, (tuple, list)):
+            return sum(nbytes(item) for item in value)
+        if hasattr(value, "element_size") and hasattr(value, "numel"):
+            return value.element_size() * value.numel()
+        return 0
+
+    return sum(nbytes(value) for value in state_dict().values())
+
+# --- SNAPSHOT & EXPORT ---
+def snapshot() -> dict:
+    """All metrics as plain data: timings (per stage), counters and gauges."""
+    with _lock:
+        timings = {
+            stage: {"count": h.count, "total_s": h.total, "max_s": h.max,
+                    "mean_ms": h.total / h.count * 1000 if h.count else 0.0,
+                    "buckets": list(h.buckets)}
+            for stage, h in _timings.items()
+        }
+        counters = dict(_counters)
+
+    gauges = {"process_rss_bytes": rss_bytes()}
+    for name, collect in list(_collectors.items()):
+        try:
+            values = collect() or {}
+        except Exception:
+            # A broken collector must never take the app (or the exporter) down
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[f"{name}_{key}"] = value
+    return {"timestamp": time.time(), "timings": timings, "counters": counters, "gauges": gauges}
+
+def _metric_name(name: str) -> str:
+    return "resume_scanner_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def prometheus_text(data: dict = None) -> str:
+    """Renders a snapshot in the Prometheus text exposition format."""
+    data = data or snapshot()
+    lines = [
+        "# HELP resume_scanner_stage_seconds Duration of instrumented stages.",
+        "# TYPE resume_scanner_stage_seconds histogram",
+    ]
+    for stage, t in sorted(data["timings"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, t["buckets"]):
+            cumulative += n
+            lines.append(f'resume_scanner_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'resume_scanner_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {t["count"]}')
+        lines.append(f'resume_scanner_stage_seconds_sum{{stage="{stage}"}} {t["total_s"]}')
+        lines.append(f'resume_scanner_stage_seconds_count{{stage="{stage}"}} {t["count"]}')
+
+    for name, value in sorted(data["counters"].items()):
+        metric = _metric_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(data["gauges"].items()):
+        if value is None:
+            continue
+        metric = _metric_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+def export(path: str = None):
+    """Writes one snapshot to 'path': Prometheus text for '.prom' (atomic rewrite), else a JSONL line."""
+    path = path or METRICS_FILE
+    data = snapshot()
+    if path.endswith(".prom"):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text(data))
+        os.replace(tmp_path, path)
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(data) + "\n")
+
+_exporter = None
+
+def start_exporter(path: str = None, interval: float = METRICS_INTERVAL):
+    """Starts (once per process) a daemon thread exporting a snapshot every 'interval' seconds."""
+    global _exporter
+    path = path or METRICS_FILE
+    if not ENABLED or not path or _exporter is not None:
+        return _exporter
+
+    def _run():
+        while True:
+            time.sleep(interval)
+            try:
+                export(path)
+            except OSError as e:
+                print(f"Metrics export to {path} failed: {e}", file=sys.stderr)
+
+    _exporter = threading.Thread(target=_run, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    return _exporter
@@ -0,0 +1,70 @@
+import re
+import metrics
+
+# --- PRECOMPILED NORMALIZATION TABLES ---
+# Character-level fixes are applied in one regex pass that only stops at the affected characters:
+# - Typographic ligatures PyPDF2 emits as one code point ("ﬁnance" -> "finance").
+# - Zero-width characters and soft hyphens, which silently split words ("Py​thon").
+# - Bullet glyphs, which would otherwise stick to the first word of each list item.
+# Non-breaking and other Unicode spaces need no entry: they are whitespace for the regex below.
+_LIGATURES = {"ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl", "ﬅ": "st", "ﬆ": "st"}
+_INVISIBLE = "­᠎​‌‍⁠﻿"
+_BULLETS = "•◦▪▫‣⁃∙●○■□►▸▶➢➤✓✔✗✘"
+
+_REPLACEMENTS = {
+    **_LIGATURES,
+    **{char: "" for char in _INVISIBLE},
+    **{char: " " for char in _BULLETS},
+}
+
+# A word broken across lines by a hyphen ("develop-\nment", also with an escaped "\\n"):
+# the hyphen and the break are removed only when a lowercase letter continues the word,
+# so compounds split before a capital ("Front-\nEnd") keep their hyphen.
+# The pattern starts with the literal hyphen (checking the letter before it afterwards), so the
+# regex engine only stops at hyphens instead of testing a lookbehind at every position.
+_HYPHEN_BREAK = re.compile(r"-(?<=[^\W\d_]-)[ \t]*(?:\r?\n|\\n)\s*(?=[a-zß-öø-ÿ])")
+# Whitespace other than the plain space (exactly what str.split() splits on), including
+# the non-breaking and narrow no-break spaces PyPDF2 emits
+_ASCII_SPACES = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f"
+_OTHER_SPACES = _ASCII_SPACES + "\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+_SPECIAL = re.compile("[" + re.escape("".join(_REPLACEMENTS)) + "]")
+# One character class: a single scan tells whether the text can be left as is
+_DIRTY_CHARS = re.compile("[" + _OTHER_SPACES + re.escape("".join(_REPLACEMENTS)) + "]")
+
+def _replace_special(match) -> str:
+    return _REPLACEMENTS[match.group()]
+
+def _is_clean(text: str) -> bool:
+    if "  " in text or "\\n" in text or text[:1] == " " or text[-1:] == " ":
+        return False
+    if text.isascii():
+        # Substring checks run at memchr speed, much faster than a regex scan
+        return not any(space in text for space in _ASCII_SPACES)
+    return not _DIRTY_CHARS.search(text)
+
+def _normalize(text: str) -> str:
+    # Idempotent: clean text (e.g., a rerun re-cleaning session state) is returned as is
+    if _is_clean(text):
+        return text
+    if not text.isascii():
+        # (str.translate() is several times slower on non-ASCII text)
+        text = _SPECIAL.sub(_replace_special, text)
+    if "-" in text:
+        text = _HYPHEN_BREAK.sub("", text)
+    # Escaped newlines become spaces; split()/join() then collapses every whitespace run and trims the edges
+    return " ".join(text.replace("\\n", " ").split())
+
+def clean_text(text: str):
+    """
+    Preprocesses text to ensure continuous sentences for AI/NLP models.
+    Removes artifacts from PDF extraction and JSON formatting: ligatures, zero-width
+    characters, bullets, hyphenated line breaks, (escaped) newlines and repeated or
+    non-breaking spaces. Cleaning already clean text returns it unchanged.
+    """
+    with metrics.timer("clean_text"):
+        return _normalize(text)
+
+def clean_texts(texts):
+    """Batch version of clean_text() for lists of documents (one metrics timing for the whole batch)."""
+    with metrics.timer("clean_text"):
+        return [_normalize(text) for text in texts]
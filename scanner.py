@@ -0,0 +1,135 @@
+"""
+Headless scoring API for Resume Scanner Pro.
+
+Everything the Streamlit app shows can be computed here without Streamlit, e.g. from
+ATS ingestion jobs or batch workers:
+
+    import scanner
+    text, pages = scanner.extract(pdf_bytes)
+    scanner.score_strict(text, job_description)
+    scanner.score_flexible(text, job_description)
+    scanner.keyword_gaps(text, job_description)
+    scanner.keyword_gaps_many(texts, job_description)   # batch version
+
+The SBERT model is only loaded the first time a Flexible score is requested, with the
+inference backend set by RESUME_SCANNER_BACKEND (see encoder.py). Call use_model() to
+inject an already loaded (or custom/stand-in) encoder instead.
+"""
+import threading
+from embeddings import EmbeddingStore
+from encoder import MODEL_NAME, cache_name, get_model
+from extraction import ExtractionError, read_pdf_cached, read_pdfs_cached
+from preprocessing import clean_text, clean_texts
+from jd_profile import get_job_profile
+from scoring import analyze_keywords
+from skills import SkillMatcher, cv_index
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def use_model(model, model_name: str = MODEL_NAME, cache: bool = True):
+    """
+    Injects the encoder used by score_flexible() and score_batch().
+    Any object with a SentenceTransformer-style encode() works. With cache=True it is
+    wrapped in the persistent EmbeddingStore (keyed by 'model_name').
+    """
+    global _encoder
+    with _encoder_lock:
+        _encoder = EmbeddingStore(model, model_name) if cache else model
+    return _encoder
+
+def get_encoder():
+    """Returns the injected encoder, loading the default SBERT model on first use."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                _encoder = EmbeddingStore(get_model(MODEL_NAME), cache_name(MODEL_NAME))
+    return _encoder
+
+def extract(pdf_bytes: bytes):
+    """
+    Extracts and cleans the text of a PDF (cached by content hash).
+    Returns (clean_text, total_pages). Failures raise extraction.ExtractionError,
+    whose 'category' tells encrypted, corrupt, empty and timed-out files apart.
+    """
+    text, total_pages = read_pdf_cached(pdf_bytes)
+    return clean_text(text), total_pages
+
+def extract_many(documents):
+    """
+    Extracts many PDFs in parallel on the worker pool (with per-file time/page budgets).
+    Returns a list aligned with 'documents': (clean_text, total_pages) or ExtractionError.
+    """
+    results = read_pdfs_cached(documents)
+    readable = [i for i, result in enumerate(results) if not isinstance(result, ExtractionError)]
+    for i, text in zip(readable, clean_texts([results[i][0] for i in readable])):
+        results[i] = (text, results[i][1])
+    return results
+
+def score_strict(cv: str, jd: str) -> float:
+    """ATS Match Score: TF-IDF cosine similarity of the CV against the JD vocabulary."""
+    return analyze_keywords(clean_text(cv), clean_text(jd)).score
+
+def score_flexible(cv: str, jd: str, encoder=None) -> float:
+    """AI Relevance Score: cosine similarity of the SBERT embeddings of both texts."""
+    encoder = encoder or get_encoder()
+    cv_embeds, desc_embeds = encoder.encode([clean_text(cv), clean_text(jd)], normalize_embeddings=True)
+    return float(cv_embeds @ desc_embeds)
+
+def keyword_gaps(cv: str, jd: str, top_n: int = 5) -> dict:
+    """
+    Keyword suggestions for a CV:
+    - missing: Every JD keyword that does not appear in the CV.
+    - priority: The 'top_n' most important JD keywords (the "Critical Skills").
+    - critical_missing: Priority keywords not found in the CV text (whole-token match, see skills.py).
+    """
+    cv = clean_text(cv)
+    analysis = analyze_keywords(cv, clean_text(jd))
+    priority = analysis.top_keywords(top_n)
+
+    return {
+        "missing": analysis.missing_keywords.tolist(),
+        "priority": priority,
+        "critical_missing": cv_index(cv).missing(priority),
+    }
+
+def keyword_gaps_many(cvs, jd: str, top_n: int = 5) -> list:
+    """
+    keyword_gaps() for many (already cleaned) CV texts against one JD, one dict per CV.
+    The priority keywords are the same for every CV, so they are compiled once into a
+    SkillMatcher that checks each CV in a single pass over its tokens.
+    """
+    jd = clean_text(jd)
+    priority = get_job_profile(jd).top_keywords(top_n)
+    matcher = SkillMatcher(priority)
+    return [
+        {
+            "missing": analyze_keywords(cv, jd).missing_keywords.tolist(),
+            "priority": priority,
+            "critical_missing": matcher.missing(cv),
+        }
+        for cv in cvs
+    ]
+
+def score_batch(cvs, jd: str, flexible: bool = True, encoder=None, batch_size: int = 32):
+    """
+    Scores many (already cleaned) CV texts against one JD.
+    The JD is fitted once into a JobProfile (memoized across calls, and across restarts
+    with RESUME_SCANNER_PERSIST=1), so all CVs cost one sparse transform plus a dot product;
+    embeddings are computed with batched encode() calls and the JD embedding is stored
+    with the profile.
+    Returns (strict_scores, flexible_scores) as numpy arrays; flexible_scores is None
+    when flexible=False.
+    """
+    profile = get_job_profile(clean_text(jd))
+    strict_scores = profile.score_many(cvs)
+
+    flexible_scores = None
+    if flexible:
+        encoder = encoder or get_encoder()
+        desc_embeds = profile.embedding(encoder)
+        cv_embeds = encoder.encode(list(cvs), batch_size=batch_size, normalize_embeddings=True)
+        flexible_scores = cv_embeds @ desc_embeds
+
+    return strict_scores, flexible_scores
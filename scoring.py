@@ -0,0 +1,182 @@
+import numpy as np
+from dataclasses import dataclass
+import metrics
+from cache import LRUCache, content_hash
+from jd_profile import JobProfile, get_job_profile, top_k
+
+# The multilingual MiniLM encoder truncates input at 128 word-piece tokens.
+# ~80 words per window keeps nearly every chunk under that limit, even for
+# languages that split into more sub-word tokens than English.
+DEFAULT_CHUNK_SIZE = 80
+DEFAULT_STRIDE = 60
+
+def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, stride: int = DEFAULT_STRIDE):
+    """
+    Splits text into overlapping word windows.
+    'chunk_size' is the number of words per window and 'stride' is how far the
+    window moves each step (stride < chunk_size creates overlap, so a sentence cut
+    at a boundary still appears whole in the next window). A stride larger than
+    'chunk_size' raises ValueError, since it would skip words.
+    """
+    if chunk_size <= 0 or stride <= 0:
+        raise ValueError("chunk_size and stride must be positive integers.")
+    if stride > chunk_size:
+        # The words between two windows would never be scored
+        raise ValueError("stride must not be larger than chunk_size.")
+
+    words = text.split()
+    if len(words) <= chunk_size:
+        return [" ".join(words)] if words else []
+
+    chunks = []
+    for start in range(0, len(words), stride):
+        chunks.append(" ".join(words[start:start + chunk_size]))
+        # Stop once the window has reached the end of the document
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+def chunked_similarity(model, cv_text: str, job_description: str,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, stride: int = DEFAULT_STRIDE,
+                       top_k: int = 3, coverage_threshold: float = 0.5, batch_size: int = 32):
+    """
+    Full-length semantic scoring that covers the whole CV instead of only its first ~128 tokens.
+
+    1. Both documents are split into windows (see chunk_text).
+    2. All JD and CV chunks are embedded in ONE batched model.encode call.
+    3. A (JD chunks x CV chunks) cosine similarity matrix is aggregated into:
+       - requirement_match: Mean over JD chunks of the best-matching CV chunk (max-sim).
+       - top_k_match: Mean over JD chunks of their 'top_k' best CV chunks (rewards
+         requirements that are backed up in several places of the CV).
+       - mean_pooled: Cosine similarity of the averaged chunk embeddings of each document.
+       - coverage: Share of JD chunks whose best CV match reaches 'coverage_threshold'.
+       - per_requirement: Best match score for every JD chunk (same order as jd_chunks).
+    """
+    jd_chunks = chunk_text(job_description, chunk_size, stride)
+    cv_chunks = chunk_text(cv_text, chunk_size, stride)
+    if not jd_chunks or not cv_chunks:
+        raise ValueError("Both the CV and the Job Description must contain text to compare.")
+
+    # One forward pass for everything; normalized vectors turn cosine similarity into a dot product
+    embeddings = model.encode(
+        jd_chunks + cv_chunks,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True
+    )
+    jd_embeds = embeddings[:len(jd_chunks)]
+    cv_embeds = embeddings[len(jd_chunks):]
+
+    sim_matrix = jd_embeds @ cv_embeds.T
+
+    # Best CV evidence for each JD requirement chunk
+    best_per_requirement = sim_matrix.max(axis=1)
+
+    # Top-k evidence: average of the k highest similarities in each JD row
+    k = min(top_k, sim_matrix.shape[1])
+    top_k_per_requirement = np.sort(sim_matrix, axis=1)[:, -k:].mean(axis=1)
+
+    # Mean pooling: compare the "average meaning" of both documents
+    jd_mean = jd_embeds.mean(axis=0)
+    cv_mean = cv_embeds.mean(axis=0)
+    mean_pooled = float(jd_mean @ cv_mean / (np.linalg.norm(jd_mean) * np.linalg.norm(cv_mean)))
+
+    return {
+        "requirement_match": float(best_per_requirement.mean()),
+        "top_k_match": float(top_k_per_requirement.mean()),
+        "mean_pooled": mean_pooled,
+        "coverage": float((best_per_requirement >= coverage_threshold).mean()),
+        "per_requirement": best_per_requirement.tolist(),
+        "jd_chunks": jd_chunks,
+        "cv_chunks": len(cv_chunks),
+    }
+
+@dataclass(frozen=True)
+class KeywordAnalysis:
+    """
+    Everything the Strict score and the keyword panels need from one TF-IDF run, kept sparse:
+    only the CV's non-zero entries and the indices of the missing keywords are stored.
+    - score: Cosine similarity between the CV and JD TF-IDF vectors.
+    - profile: The fitted JobProfile (JD vocabulary, weights and priority).
+    - cv_columns / cv_weights: Keyword indices present in the CV and their TF-IDF weights (CSR row).
+    - missing: Indices of keywords present in the JD but absent from the CV (alphabetical order).
+    """
+    score: float
+    profile: JobProfile
+    cv_columns: np.ndarray
+    cv_weights: np.ndarray
+    missing: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the CV-specific arrays (the profile is shared and accounted by the profile cache)."""
+        return self.cv_columns.nbytes + self.cv_weights.nbytes + self.missing.nbytes
+
+    @property
+    def keywords(self):
+        return self.profile.keywords
+
+    @property
+    def jd_weights(self):
+        return self.profile.jd_weights
+
+    @property
+    def priority(self) -> tuple:
+        """Keywords sorted by JD weight, most important first."""
+        return self.profile.priority
+
+    @property
+    def missing_keywords(self):
+        return self.profile.keywords[self.missing]
+
+    def top_keywords(self, k: int) -> list:
+        """The 'k' most important JD keywords (partial selection, see jd_profile.top_k)."""
+        return self.profile.top_keywords(k)
+
+    def top_missing(self, k: int) -> list:
+        """The 'k' most important JD keywords that the CV lacks, most important first."""
+        return self.profile.keywords[self.missing[top_k(self.profile.jd_weights[self.missing], k)]].tolist()
+
+# Shared across sessions: the same (CV, JD) pair is only vectorized once, no matter
+# how many reruns (mode switches, multiselect edits) or users request it. Bounded by bytes
+# as well: the missing-keyword indices of a long JD make some entries much larger than others.
+_analysis_cache = LRUCache(max_items=256, max_bytes=16 * 2**20)
+metrics.register_collector("analysis_cache", _analysis_cache.stats)
+
+def analyze_keywords(cv_text: str, job_description: str) -> KeywordAnalysis:
+    """
+    Runs the TF-IDF keyword analysis once per (CV, JD) pair and memoizes the result.
+    The JD is fitted once into a JobProfile (the vocabulary "Ground Truth", see jd_profile.py)
+    and the CV is only transformed with that vocabulary. Raises ValueError ("empty vocabulary")
+    when the JD contains only stop words, exactly like TfidfVectorizer does.
+    """
+    key = (content_hash(cv_text), content_hash(job_description))
+    cached = _analysis_cache.get(key)
+    if cached is not None:
+        return cached
+
+    profile = get_job_profile(job_description)
+    with metrics.timer("tfidf_transform"):
+        cv_vector = profile.transform([cv_text])
+    with metrics.timer("keyword_gaps"):
+        # Work on the CSR row directly: the CV only has a few of the JD's terms
+        cv_vector.sort_indices()
+        cv_columns = cv_vector.indices
+        cv_weights = cv_vector.data
+        present = np.zeros(len(profile.keywords), dtype=bool)
+        present[cv_columns] = True
+        missing = np.flatnonzero(~present)
+
+    analysis = KeywordAnalysis(
+        score=float(cv_weights @ profile.jd_weights[cv_columns]),
+        profile=profile,
+        cv_columns=cv_columns,
+        cv_weights=cv_weights,
+        missing=missing,
+    )
+    # The cached arrays are shared between sessions, so freeze them against accidental edits
+    for array in (analysis.cv_columns, analysis.cv_weights, analysis.missing):
+        array.setflags(write=False)
+
+    _analysis_cache.put(key, analysis)
+    return analysis
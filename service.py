@@ -0,0 +1,281 @@
+"""
+Micro-batching embedding service.
+
+Every Streamlit session runs its script on its own thread, so concurrent users would each
+call encode() with one or two texts and the shared model would run many tiny forward
+passes. EmbeddingService sits in front of the encoder (usually the EmbeddingStore) and:
+
+1. Queues encode requests from any thread on an asyncio event loop (its own daemon thread).
+2. Waits a few milliseconds for more requests to arrive, then runs ONE batched encode()
+   for all of them on a dedicated worker thread, while the loop keeps collecting the next batch.
+3. Fans the vectors back out to the waiting callers.
+
+Backpressure: the queue has a maximum depth; requests beyond it fail fast with
+ServiceOverloaded instead of piling up. Every request has a deadline for getting a batch
+slot; requests that expire while queued are dropped before they reach the model. Once a
+request is being encoded, only the separate (larger) compute bound applies, so a long
+Chunked Mode encode is not reported as a busy server.
+
+Configuration (environment variables):
+- RESUME_SCANNER_BATCH_WAIT_MS: How long a batch waits for more requests (default 5 ms).
+- RESUME_SCANNER_MAX_BATCH: Texts per batched forward pass (default 64).
+- RESUME_SCANNER_QUEUE_DEPTH: Maximum queued requests (default 256).
+- RESUME_SCANNER_ENCODE_TIMEOUT: Seconds a request may wait for a batch slot (default 30).
+- RESUME_SCANNER_ENCODE_COMPUTE_TIMEOUT: Seconds a started batch may take (default 300).
+"""
+import os
+import time
+import asyncio
+import threading
+import numpy as np
+import metrics
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+BATCH_WAIT_MS = float(os.environ.get("RESUME_SCANNER_BATCH_WAIT_MS", 5))
+MAX_BATCH = int(os.environ.get("RESUME_SCANNER_MAX_BATCH", 64))
+QUEUE_DEPTH = int(os.environ.get("RESUME_SCANNER_QUEUE_DEPTH", 256))
+ENCODE_TIMEOUT = float(os.environ.get("RESUME_SCANNER_ENCODE_TIMEOUT", 30))
+COMPUTE_TIMEOUT = float(os.environ.get("RESUME_SCANNER_ENCODE_COMPUTE_TIMEOUT", 300))
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when the request queue is full (backpressure)."""
+
+class _Request:
+    __slots__ = ("texts", "submitted", "deadline", "future")
+
+    def __init__(self, texts, deadline: float):
+        self.texts = texts
+        self.submitted = time.monotonic()
+        self.deadline = deadline
+        self.future = Future()
+
+class EmbeddingService:
+    """
+    Collects concurrent encode() calls into batched forward passes of 'encoder'.
+    encode() mirrors SentenceTransformer.encode(), so the service can be passed anywhere
+    a model or an EmbeddingStore is expected (chunked_similarity, rank_resumes, ...).
+    """
+
+    def __init__(self, encoder, max_batch: int = MAX_BATCH, batch_wait_ms: float = BATCH_WAIT_MS,
+                 queue_depth: int = QUEUE_DEPTH, timeout: float = ENCODE_TIMEOUT, batch_size: int = 32,
+                 compute_timeout: float = COMPUTE_TIMEOUT):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.compute_timeout = compute_timeout
+        self.batch_size = batch_size
+
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.rejected = 0
+        self.expired = 0
+
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._task = None
+        # One worker: the model is the shared resource, so batches run one after another
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batch")
+        self._lock = threading.Lock()
+
+    # --- EVENT LOOP ---
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name="embedding-service", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+            self._loop = loop
+
+    async def _start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_depth)
+        self._task = asyncio.get_running_loop().create_task(self._batcher())
+
+    def _enqueue(self, request: _Request):
+        # Runs on the loop thread, so the counters need no lock
+        self.requests += 1
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            if not request.future.set_running_or_notify_cancel():
+                return
+            request.future.set_exception(ServiceOverloaded(
+                f"The embedding service is overloaded ({self.queue_depth} requests queued). Please retry shortly."
+            ))
+
+    async def _collect(self):
+        """Waits for one request, then gathers more for up to 'batch_wait' seconds or until the batch is full."""
+        batch = [await self._queue.get()]
+        n_texts = len(batch[0].texts)
+        loop = asyncio.get_running_loop()
+        collect_until = loop.time() + self.batch_wait
+
+        while n_texts < self.max_batch:
+            remaining = collect_until - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(request)
+            n_texts += len(request.texts)
+        return batch
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            # Drop requests whose caller gave up or whose deadline passed while queued
+            live = []
+            now = time.monotonic()
+            for request in batch:
+                if not request.future.set_running_or_notify_cancel():
+                    self.expired += 1
+                elif request.deadline < now:
+                    self.expired += 1
+                    request.future.set_exception(TimeoutError("The embedding request expired in the queue."))
+                else:
+                    live.append(request)
+            if not live:
+                continue
+
+            texts = [text for request in live for text in request.texts]
+            metrics.observe("service_queue_wait", now - min(request.submitted for request in live))
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._encode, texts)
+            except Exception as e:
+                if len(live) == 1:
+                    live[0].future.set_exception(e)
+                    continue
+                # Isolate the failing request instead of failing every caller in the batch
+                for request in live:
+                    try:
+                        request.future.set_result(await loop.run_in_executor(self._executor, self._encode, request.texts))
+                    except Exception as request_error:
+                        request.future.set_exception(request_error)
+                continue
+
+            self.batches += 1
+            self.batched_texts += len(texts)
+            start = 0
+            for request in live:
+                request.future.set_result(vectors[start:start + len(request.texts)])
+                start += len(request.texts)
+
+    def _encode(self, texts):
+        return np.asarray(self.encoder.encode(texts, batch_size=self.batch_size, convert_to_numpy=True),
+                          dtype=np.float32)
+
+    # --- PUBLIC API ---
+    def submit(self, texts, timeout: float = None) -> Future:
+        """Queues a list of texts; returns a concurrent.futures.Future of their (raw) vectors."""
+        self._ensure_started()
+        request = _Request(list(texts), time.monotonic() + (timeout or self.timeout))
+        self._loop.call_soon_threadsafe(self._enqueue, request)
+        return request.future
+
+    def encode(self, sentences, batch_size: int = None, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True, timeout: float = None, **kwargs):
+        """
+        Drop-in replacement for model.encode(); blocks until the batch containing this request ran.
+        Raises ServiceOverloaded when the queue is full, and TimeoutError when the request waited
+        'timeout' seconds without reaching the model or its batch took longer than 'compute_timeout'.
+        Calls with extra model arguments (e.g., show_progress_bar) go straight to the encoder.
+        """
+        if kwargs:
+            return self.encoder.encode(sentences, batch_size=batch_size or self.batch_size,
+                                       normalize_embeddings=normalize_embeddings,
+                                       convert_to_numpy=convert_to_numpy, **kwargs)
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        timeout = timeout or self.timeout
+        future = self.submit(texts, timeout)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            # The deadline covers the wait for a batch slot; a request already being encoded
+            # (cancel() fails once it runs) gets the compute bound instead
+            if future.cancel():
+                raise TimeoutError(f"The embedding request waited more than {timeout:g}s for the model.") from None
+            try:
+                result = future.result(timeout=self.compute_timeout)
+            except FutureTimeout:
+                raise TimeoutError(f"The embedding batch took longer than {self.compute_timeout:g}s.") from None
+
+        if normalize_embeddings:
+            result = result / np.clip(np.linalg.norm(result, axis=1, keepdims=True), 1e-12, None)
+        if not convert_to_numpy:
+            import torch
+            result = torch.from_numpy(result)
+        return result[0] if single else result
+
+    async def encode_async(self, sentences, normalize_embeddings: bool = False, timeout: float = None):
+        """Awaitable encode() for asyncio callers (on any event loop)."""
+        single = isinstance(sentences, str)
+        timeout = timeout or self.timeout
+        future = self.submit([sentences] if single else sentences, timeout)
+        wrapped = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({wrapped}, timeout=timeout)
+        if not done:
+            # Same rule as encode(): only a request still waiting for the model times out here
+            if future.cancel():
+                raise TimeoutError(f"The embedding request waited more than {timeout:g}s for the model.")
+            done, _ = await asyncio.wait({wrapped}, timeout=self.compute_timeout)
+            if not done:
+                raise TimeoutError(f"The embedding batch took longer than {self.compute_timeout:g}s.")
+        result = wrapped.result()
+        if normalize_embeddings:
+            result = result / np.clip(np.linalg.norm(result, axis=1, keepdims=True), 1e-12, None)
+        return result[0] if single else result
+
+    def get_sentence_embedding_dimension(self):
+        return self.encoder.get_sentence_embedding_dimension()
+
+    @property
+    def model_name(self):
+        # Lets per-model caches (e.g., JD profile embeddings) see through the service
+        return getattr(self.encoder, "model_name", type(self.encoder).__name__)
+
+    def stats(self) -> dict:
+        """Service counters, merged with the wrapped encoder's cache stats (if it has any)."""
+        stats = dict(self.encoder.stats()) if hasattr(self.encoder, "stats") else {}
+        stats.update({
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_texts": self.batched_texts / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        })
+        return stats
+
+    async def _shutdown(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def close(self):
+        """Stops the event loop and the worker thread (queued requests are abandoned)."""
+        with self._lock:
+            if self._loop is not None:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop.close()
+                self._loop = None
+                self._queue = None
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,213 @@
+"""
+Memory-bounded multi-user sessions.
+
+Streamlit keeps every session's state in the server process until the session is gone,
+so large per-session values (extracted CV text, ranking tables) used to pile up through
+the day. Instead, sessions now keep only small handles, and the values live in one
+shared ArtifactStore:
+
+- Deduplicated: artifacts are keyed by content hash, so ten recruiters screening the
+  same resume hold one copy of its text.
+- Size-bounded: artifacts no session references any more are kept as a cache and evicted
+  in LRU order beyond RESUME_SCANNER_ARTIFACT_MB (default 256 MB).
+- Per-session cap: a session holding more than RESUME_SCANNER_SESSION_MB (default 64 MB)
+  releases its oldest artifacts first.
+- Idle eviction: sessions without a rerun for RESUME_SCANNER_SESSION_TTL seconds
+  (default 1800) release all their artifacts; a background sweeper checks every minute.
+  A returning user finds an expired handle and simply starts a new analysis.
+
+report() returns the current footprint (sessions, store bytes, evictions, process RSS).
+"""
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+import metrics
+from cache import content_hash, sizeof
+
+SESSION_TTL = float(os.environ.get("RESUME_SCANNER_SESSION_TTL", 1800))
+ARTIFACT_BYTES = int(float(os.environ.get("RESUME_SCANNER_ARTIFACT_MB", 256)) * 2**20)
+SESSION_BYTES = int(float(os.environ.get("RESUME_SCANNER_SESSION_MB", 64)) * 2**20)
+SWEEP_INTERVAL = 60
+
+class ArtifactStore:
+    """
+    Shared store of large values with reference counts. Referenced artifacts are never
+    evicted; unreferenced ones stay cached (for the next session that needs them) until
+    the store exceeds 'max_bytes'.
+    """
+
+    def __init__(self, max_bytes: int = ARTIFACT_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()   # key -> [value, size, refs]
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, value, key: str = None, acquire: bool = False) -> str:
+        """
+        Stores a value and returns its key: the content hash for text and bytes (identical
+        content is stored once), else 'key' or a random one. With acquire=True the new
+        reference is taken before any eviction, so the value cannot be evicted right away.
+        """
+        if key is None:
+            key = content_hash(value) if isinstance(value, (str, bytes)) else uuid.uuid4().hex
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+            else:
+                size = sizeof(value)
+                self._items[key] = [value, size, 0]
+                self.bytes += size
+            if acquire:
+                self._items[key][2] += 1
+            self._evict()
+        return key
+
+    def get(self, key: str):
+        """The stored value, or None when it was evicted."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def size(self, key: str) -> int:
+        item = self._items.get(key)
+        return item[1] if item is not None else 0
+
+    def acquire(self, key: str):
+        with self._lock:
+            if key in self._items:
+                self._items[key][2] += 1
+
+    def release(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[2] > 0:
+                item[2] -= 1
+                self._evict()
+
+    def _evict(self):
+        # Oldest unreferenced artifacts first; referenced ones are skipped, not evicted
+        if self.bytes <= self.max_bytes:
+            return
+        for key in [key for key, item in self._items.items() if item[2] == 0]:
+            if self.bytes <= self.max_bytes:
+                break
+            self.bytes -= self._items.pop(key)[1]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            referenced = sum(item[1] for item in self._items.values() if item[2] > 0)
+            return {"items": len(self._items), "bytes": self.bytes, "referenced_bytes": referenced,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+class SessionManager:
+    """
+    Tracks which artifacts each session references (by handle name, e.g. "cv_text") and
+    when it was last active. Every session id and handle name maps to one artifact key.
+    """
+
+    def __init__(self, store: ArtifactStore = None, ttl: float = SESSION_TTL, session_bytes: int = SESSION_BYTES):
+        self.store = store or ArtifactStore()
+        self.ttl = ttl
+        self.session_bytes = session_bytes
+        self._sessions = {}           # session id -> {"last_seen": t, "handles": OrderedDict(name -> key)}
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self.expired_sessions = 0
+
+    def _session(self, session_id: str) -> dict:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {"last_seen": time.monotonic(), "handles": OrderedDict()}
+        return session
+
+    def touch(self, session_id: str):
+        """Marks the session as active (call once per script run)."""
+        with self._lock:
+            self._session(session_id)["last_seen"] = time.monotonic()
+
+    def put(self, session_id: str, name: str, value, key: str = None) -> str:
+        """
+        Stores 'value' under the session's handle 'name' (replacing the previous artifact)
+        and returns the artifact key, i.e. the handle to keep in session state.
+        """
+        with self._lock:
+            key = self.store.put(value, key, acquire=True)
+            session = self._session(session_id)
+            session["last_seen"] = time.monotonic()
+            previous = session["handles"].pop(name, None)
+            session["handles"][name] = key
+            if previous is not None:
+                self.store.release(previous)
+
+            # Per-session cap: release the oldest handles until the session fits (the newest always stays)
+            while len(session["handles"]) > 1 and \
+                    sum(self.store.size(k) for k in session["handles"].values()) > self.session_bytes:
+                _, oldest = session["handles"].popitem(last=False)
+                self.store.release(oldest)
+        return key
+
+    def get(self, session_id: str, name: str):
+        """The artifact behind the session's handle 'name', or None (never set, released or expired)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            key = session["handles"].get(name) if session is not None else None
+        return self.store.get(key) if key is not None else None
+
+    def drop(self, session_id: str, name: str):
+        """Releases one handle of the session."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            key = session["handles"].pop(name, None) if session is not None else None
+            if key is not None:
+                self.store.release(key)
+
+    def sweep(self) -> int:
+        """Releases every artifact of sessions idle for longer than the TTL. Returns how many expired."""
+        deadline = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if session["last_seen"] < deadline]
+            for sid in expired:
+                for key in self._sessions.pop(sid)["handles"].values():
+                    self.store.release(key)
+            self.expired_sessions += len(expired)
+        return len(expired)
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL):
+        """Starts (once) a daemon thread that sweeps idle sessions every 'interval' seconds."""
+        if self._sweeper is not None:
+            return self._sweeper
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                self.sweep()
+
+        self._sweeper = threading.Thread(target=_run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+        return self._sweeper
+
+    def report(self) -> dict:
+        """Current memory footprint: sessions, shared store usage, evictions and process RSS."""
+        store = self.store.stats()
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            "active_sessions": sessions,
+            "expired_sessions": self.expired_sessions,
+            "artifact_items": store["items"],
+            "artifact_bytes": store["bytes"],
+            "referenced_bytes": store["referenced_bytes"],
+            "artifact_evictions": store["evictions"],
+            "process_rss_bytes": metrics.rss_bytes(),
+        }
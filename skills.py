@@ -0,0 +1,220 @@
+import re
+import sys
+from collections import deque
+import metrics
+from cache import LRUCache, content_hash
+
+# A token is a run of word characters that may contain '.', '+', '#' or "'" between word
+# characters and may end in '+'/'#', so "Node.js", "C++", "C#", ".NET" and "3.5" stay whole
+# while "Java" and "JavaScript" are different tokens. Hyphens and slashes separate tokens,
+# so "full-stack" matches the skill "full stack" and "CI/CD" matches "ci cd".
+TOKEN_PATTERN = re.compile(r"\.?\w+(?:[.'+#]\w+)*[+#]*")
+
+# The word runs inside a compound token ("node.js" -> "node", "js"; ".net" -> "net").
+# The TF-IDF keywords are split this way, so the CV index answers them as well.
+_WORD_RUN = re.compile(r"\w+")
+
+# Multi-word skills up to this many tokens are answered from a precomputed n-gram table.
+# Longer phrases are verified from the positions of their first token.
+MAX_NGRAM = 3
+
+def tokenize(text: str):
+    """Returns (tokens, spans): casefolded tokens and their (start, end) offsets in 'text'."""
+    tokens, spans = [], []
+    for match in TOKEN_PATTERN.finditer(text):
+        tokens.append(match.group().casefold())
+        spans.append(match.span())
+    return tokens, spans
+
+def skill_tokens(skill: str) -> tuple:
+    """Normalized token sequence of a skill or phrase (same rules as the CV text)."""
+    return tuple(tokenize(skill)[0])
+
+def word_runs(token: str) -> tuple:
+    """The distinct word runs of a compound token ("node.js" -> ("node", "js")); () for a plain word."""
+    parts = _WORD_RUN.findall(token)
+    if len(parts) > 1 or token[0] == ".":
+        return tuple(dict.fromkeys(parts))
+    return ()
+
+def _find_literal(text: str, skill: str):
+    """Case-insensitive substring spans, for skills without any word characters (e.g. "++")."""
+    needle = skill.strip()
+    if not needle:
+        return []
+    return [m.span() for m in re.finditer(re.escape(needle), text, re.IGNORECASE)]
+
+class CVIndex:
+    """
+    Precomputed lookup structure over one CV, built once per extracted text.
+
+    - positions: token -> list of token indices (the normalized token set is its keys).
+      Compound tokens are also filed under their word runs ("Node.js" under "node" and
+      "js", "ASP.NET" under "asp" and "net"), so the split keywords of the TF-IDF analysis
+      are found too. A trailing "++"/"#" does not split: "C" still does not match "C++".
+    - ngrams: (token, token[, token]) -> list of start indices, for multi-word skills.
+
+    contains()/find() answer a skill in roughly constant time, independent of the CV
+    length: one dictionary lookup for skills of up to MAX_NGRAM tokens. Matches respect
+    token boundaries, so "R" does not match inside "React" and "Java" does not match
+    "JavaScript".
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens, self.spans = tokenize(text)
+        self.positions = {}
+        for i, token in enumerate(self.tokens):
+            self.positions.setdefault(token, []).append(i)
+            for part in word_runs(token):
+                self.positions.setdefault(part, []).append(i)
+
+        self.ngrams = {}
+        for n in range(2, MAX_NGRAM + 1):
+            for i in range(len(self.tokens) - n + 1):
+                self.ngrams.setdefault(tuple(self.tokens[i:i + n]), []).append(i)
+
+        self.nbytes = self._measure()
+
+    def _measure(self) -> int:
+        """Approximate memory of the index (text, token lists and both lookup tables), for the byte-bounded cache."""
+        # Every stored position is a list slot plus (beyond the small-int cache) an int object
+        n_positions = sum(len(rows) for rows in self.positions.values()) + \
+            sum(len(rows) for rows in self.ngrams.values())
+        return (sys.getsizeof(self.text)
+                + sys.getsizeof(self.tokens) + sum(sys.getsizeof(token) for token in self.tokens)
+                + sys.getsizeof(self.spans) + len(self.spans) * (sys.getsizeof((0, 0)) + 2 * 28)
+                + sys.getsizeof(self.positions) + sys.getsizeof(self.ngrams)
+                + sum(sys.getsizeof(rows) for rows in self.positions.values())
+                + sum(sys.getsizeof(key) + sys.getsizeof(rows) for key, rows in self.ngrams.items())
+                + n_positions * 36)
+
+    def _starts(self, tokens: tuple):
+        """Token indices where the token sequence 'tokens' starts."""
+        if len(tokens) == 1:
+            return self.positions.get(tokens[0], [])
+        if len(tokens) <= MAX_NGRAM:
+            return self.ngrams.get(tokens, [])
+        # Long phrase: extend every occurrence of its first n-gram
+        n = len(tokens)
+        return [i for i in self.ngrams.get(tokens[:MAX_NGRAM], [])
+                if tuple(self.tokens[i:i + n]) == tokens]
+
+    def find(self, skill: str):
+        """
+        Character spans (start, end) of every occurrence of 'skill' in the CV text.
+        Skills without any word characters (e.g. "++") fall back to a case-insensitive substring search.
+        """
+        tokens = skill_tokens(skill)
+        if not tokens:
+            return _find_literal(self.text, skill)
+
+        n = len(tokens)
+        return [(self.spans[i][0], self.spans[i + n - 1][1]) for i in self._starts(tokens)]
+
+    def contains(self, skill: str) -> bool:
+        return bool(self.find(skill))
+
+    def missing(self, skills):
+        """The skills (in their given order) that do not occur in the CV."""
+        return [skill for skill in skills if not self.contains(skill)]
+
+# Shared across sessions/reruns: each distinct CV text is indexed once. Bounded by bytes, not
+# only by count: the index of a 30-page CV takes several MB.
+_index_cache = LRUCache(max_items=256, max_bytes=64 * 2**20)
+metrics.register_collector("cv_index_cache", _index_cache.stats)
+
+def cv_index(text: str) -> CVIndex:
+    """Returns the (memoized) CVIndex of a CV text."""
+    key = content_hash(text)
+    index = _index_cache.get(key)
+    if index is None:
+        index = CVIndex(text)
+        _index_cache.put(key, index)
+    return index
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over token sequences for a fixed list of skills/phrases.
+
+    Built once per skill list (e.g. the 50+ custom skills of a posting), it finds every
+    skill in a CV in a single pass over the CV's tokens, so checking thousands of CVs
+    against hundreds of skills costs O(tokens) per CV instead of O(tokens x skills).
+    Matches agree with CVIndex: single-token skills are also found in the word runs of
+    compound tokens ("node" and "js" in "Node.js").
+    """
+
+    def __init__(self, skills):
+        self.skills = list(dict.fromkeys(skills))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._fallback = []
+        self._single = {}         # token -> ids of the single-token skills, for word runs
+
+        # 1. TRIE: One path of token transitions per skill
+        for skill_id, skill in enumerate(self.skills):
+            tokens = skill_tokens(skill)
+            if not tokens:
+                self._fallback.append(skill_id)
+                continue
+            if len(tokens) == 1:
+                self._single.setdefault(tokens[0], []).append(skill_id)
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((skill_id, len(tokens)))
+
+        # 2. FAILURE LINKS: Breadth-first, so each state inherits the outputs of its longest suffix
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def match(self, cv):
+        """
+        Finds every skill in 'cv' (a CV text or a CVIndex). A text is only tokenized, not indexed,
+        so scanning thousands of CVs does not fill the CVIndex cache.
+        Returns {skill: [(start, end), ...]} with an entry for every skill (empty when absent).
+        """
+        if isinstance(cv, CVIndex):
+            text, tokens, spans = cv.text, cv.tokens, cv.spans
+        else:
+            text = cv
+            tokens, spans = tokenize(cv)
+        found = {skill: [] for skill in self.skills}
+
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for skill_id, length in self._output[state]:
+                found[self.skills[skill_id]].append((spans[i - length + 1][0], spans[i][1]))
+            # Word runs of a compound token only answer single-token skills, like CVIndex.positions
+            for part in word_runs(token):
+                for skill_id in self._single.get(part, ()):
+                    found[self.skills[skill_id]].append(spans[i])
+
+        for skill_id in self._fallback:
+            skill = self.skills[skill_id]
+            found[skill] = _find_literal(text, skill)
+        return found
+
+    def missing(self, cv):
+        """The skills (in their given order) that do not occur in 'cv'."""
+        found = self.match(cv)
+        return [skill for skill in self.skills if not found[skill]]
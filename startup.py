@@ -0,0 +1,55 @@
+"""
+Cold-start timing for Resume Scanner Pro.
+
+Inside the app, phases are recorded with timed() and shown in the sidebar's
+"Startup Report". Run this file directly to measure how long each heavy dependency
+takes to import in a fresh interpreter (what every new replica pays):
+
+    python startup.py
+"""
+import sys
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+
+_phases = {}
+_lock = threading.Lock()
+
+def record(phase: str, seconds: float):
+    """Stores the duration of a startup phase (the first measurement of a phase wins)."""
+    with _lock:
+        _phases.setdefault(phase, seconds)
+
+@contextmanager
+def timed(phase: str):
+    """Context manager that records how long the wrapped block took under 'phase'."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+def report():
+    """Returns the recorded phases as a list of (phase, seconds), in the order they happened."""
+    with _lock:
+        return list(_phases.items())
+
+# Modules that dominate cold start, in the order the app would need them
+HEAVY_MODULES = ["streamlit", "pandas", "numpy", "PyPDF2", "sklearn.feature_extraction.text",
+                 "nltk", "torch", "sentence_transformers"]
+
+def measure_imports(modules=HEAVY_MODULES):
+    """Measures the cold import time of each module in its own fresh interpreter."""
+    results = []
+    for module in modules:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        seconds = float(completed.stdout.strip()) if completed.returncode == 0 else None
+        results.append((module, seconds))
+    return results
+
+if __name__ == "__main__":
+    print(f"{'Module':<35}{'Cold import (s)':>16}")
+    for module, seconds in measure_imports():
+        print(f"{module:<35}{'not installed' if seconds is None else f'{seconds:.3f}':>16}")
@@ -0,0 +1,88 @@
+"""
+Page-incremental extraction and scoring for long resumes.
+
+stream_score() parses the PDF one page at a time, embeds each page's chunks as soon as
+the page is extracted and yields a PageResult after every page, so a 30-page academic CV
+shows a first score after one page instead of after all of them. Pages come from
+extraction.iter_pdf_pages(): from the extraction cache when the file was read before,
+else from the worker pool (the first page alone, then page ranges read ahead of the
+scoring), under the same time budget and stuck-page kill as every other mode. The running score is kept as one "best match so far" value per Job Description chunk.
+
+The score is the Chunked Mode "requirement match" (mean over JD chunks of their best
+CV chunk), updated page by page. Chunks are formed per page, so a chunk never spans a
+page break.
+"""
+import time
+import numpy as np
+import metrics
+from dataclasses import dataclass
+from extraction import DOCUMENT_TIMEOUT, MAX_PAGES, iter_pdf_pages
+from preprocessing import clean_text
+from scoring import DEFAULT_CHUNK_SIZE, DEFAULT_STRIDE, chunk_text
+
+@dataclass(frozen=True)
+class PageResult:
+    """
+    The outcome of one page:
+    - page / total_pages: 1-based page number and the document's page count.
+    - text: The cleaned text of the page.
+    - relevance: Mean best match of the JD requirement chunks within this page alone.
+    - running_score: Requirement match over every page so far (the final score after the last page).
+    - coverage: Share of JD chunks matched at 'coverage_threshold' or better so far.
+    """
+    page: int
+    total_pages: int
+    text: str
+    relevance: float
+    running_score: float
+    coverage: float
+
+def stream_score(pdf_bytes: bytes, job_description: str, encoder,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, stride: int = DEFAULT_STRIDE,
+                 coverage_threshold: float = 0.5, cancel=None,
+                 max_pages: int = MAX_PAGES, timeout: float = DOCUMENT_TIMEOUT):
+    """
+    Generator of PageResult, one per extracted page (within the 'max_pages' budget).
+
+    'encoder' is anything with a SentenceTransformer-style encode() (model, EmbeddingStore
+    or EmbeddingService). 'cancel' is an optional threading.Event: once it is set, the
+    generator stops before the next page. Closing the generator (e.g., breaking out of the
+    loop) stops extraction as well. Extraction failures raise extraction.ExtractionError;
+    a JD without text raises ValueError.
+    """
+    started = time.perf_counter()
+    jd_chunks = chunk_text(job_description, chunk_size, stride)
+    if not jd_chunks:
+        raise ValueError("The Job Description must contain text to compare.")
+    jd_embeds = encoder.encode(jd_chunks, normalize_embeddings=True, convert_to_numpy=True)
+
+    # Best CV evidence found so far for every JD requirement chunk
+    best = np.full(len(jd_chunks), -1.0, dtype=np.float32)
+    seen_text = False
+
+    for index, raw_text, total_pages in iter_pdf_pages(pdf_bytes, max_pages, timeout):
+        if cancel is not None and cancel.is_set():
+            return
+
+        text = clean_text(raw_text or "")
+        chunks = chunk_text(text, chunk_size, stride)
+        relevance = 0.0
+        if chunks:
+            # (JD chunks x page chunks) similarities for this page only
+            page_embeds = encoder.encode(chunks, normalize_embeddings=True, convert_to_numpy=True)
+            page_best = (jd_embeds @ page_embeds.T).max(axis=1)
+            np.maximum(best, page_best, out=best)
+            relevance = float(page_best.mean())
+            seen_text = True
+        if index == 0:
+            # Time until the user sees a first score (the point of streaming)
+            metrics.observe("stream_first_page", time.perf_counter() - started)
+
+        yield PageResult(
+            page=index + 1,
+            total_pages=total_pages,
+            text=text,
+            relevance=relevance,
+            running_score=float(best.mean()) if seen_text else 0.0,
+            coverage=float((best >= coverage_threshold).mean()) if seen_text else 0.0,
+        )
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skills import CVIndex, SkillMatcher
+
+CV = "Built services with Node.js, Vue.js and ASP.NET Core; also C++ and .NET 6."
+
+def test_dotted_skills_match_whole():
+    index = CVIndex(CV)
+    assert index.missing(["Node.js", "vue.js", "ASP.NET", ".NET", "C++"]) == []
+
+def test_dotted_skills_match_split_keywords():
+    # The TF-IDF priority keywords split "Node.js" into "node" and "js"
+    index = CVIndex(CV)
+    assert index.missing(["node", "js", "vue", "asp", "net", "core"]) == []
+    assert index.find("net") == [(CV.index("ASP.NET"), CV.index("ASP.NET") + 7),
+                                 (CV.index(".NET 6"), CV.index(".NET 6") + 4)]
+
+def test_word_boundaries_still_hold():
+    index = CVIndex(CV)
+    # "C" is not a word run of "C++", and no skill matches inside a longer word
+    assert index.missing(["C", "Node", "Java", "Vue"]) == ["C", "Java"]
+
+def test_skill_matcher_agrees_on_whole_tokens():
+    assert SkillMatcher(["Node.js", "ASP.NET", "Python"]).missing(CV) == ["Python"]
+
+def test_skill_matcher_agrees_on_split_keywords():
+    skills = ["js", "node", "net", "vue", "C", "Java", "ASP.NET Core", "++"]
+    matcher = SkillMatcher(skills)
+    index = CVIndex(CV)
+    assert matcher.missing(CV) == index.missing(skills) == ["C", "Java"]
+    assert matcher.match(CV) == {skill: index.find(skill) for skill in skills}
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import ResumeIndex
+
+DIM = 4
+
+def unit(i):
+    vector = np.zeros((1, DIM), dtype=np.float32)
+    vector[0, i] = 1.0
+    return vector
+
+def test_two_writers_on_one_folder(tmp_path):
+    # E.g., the CLI adding resumes while the app is running
+    first, second = ResumeIndex(str(tmp_path), DIM), ResumeIndex(str(tmp_path), DIM)
+    first.add(["a"], unit(0), texts=["resume a"])
+    second.add(["b"], unit(1), texts=["resume b"])
+
+    reloaded = ResumeIndex(str(tmp_path), DIM)
+    assert reloaded._rows == {"a": 0, "b": 1}
+    assert reloaded.search_vector(unit(1)[0], k=1) == [("b", 1.0)]
+    assert reloaded.texts(["a", "b"]) == ["resume a", "resume b"]
+
+def test_append_after_torn_row(tmp_path):
+    index = ResumeIndex(str(tmp_path), DIM)
+    index.add(["a"], unit(0), texts=["resume a"])
+    # A crash mid-append left part of a vector behind
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\x00" * 6)
+    index.add(["b"], unit(1), texts=["resume b"])
+
+    reloaded = ResumeIndex(str(tmp_path), DIM)
+    assert reloaded.search_vector(unit(1)[0], k=1) == [("b", 1.0)]
+    assert os.path.getsize(tmp_path / "vectors.f32") == 2 * DIM * 4
+
+def test_memory_index_keeps_the_newest_resumes():
+    index = ResumeIndex(None, DIM, max_memory_resumes=2)
+    for i, resume in enumerate("abcd"):
+        index.add([resume], unit(i), texts=[f"resume {resume}"])
+
+    assert sorted(index._rows) == ["c", "d"]
+    assert index.texts(["c", "d"]) == ["resume c", "resume d"]
+    assert index.stats()["evictions"] == 2
@@ -0,0 +1,649 @@
+"""
+Persistent vector index of resume embeddings, for the reverse query: given a Job
+Description, find the best-matching CVs among every resume scanned so far.
+
+    index = ResumeIndex.open(encoder)               # one index per model/backend
+    index.add_texts(cv_texts, encoder, names=file_names)
+    index.search(job_description, encoder, k=10)    # [Match(id, name, score, ...)]
+    index.remove([resume_id])
+
+Storage (under CACHE_ROOT/index/<model> with RESUME_SCANNER_PERSIST=1; otherwise, or when
+the folder is unwritable, the index lives in memory). Writes take an inter-process file lock
+(write.lock), so the CLI and the app, or several replicas, can share one folder:
+- vectors.f32: Append-only float32 rows (unit length), read through a numpy memmap.
+- texts.txt: The cleaned CV texts, read back only for the TF-IDF re-rank.
+- records.jsonl: One line per insert (id, row, name, text offset) or delete (tombstone).
+- ivf.npz: IVF centroids and the list of every row they were trained on (large pools only).
+
+Search strategy:
+- Small pools (fewer live resumes than RESUME_SCANNER_IVF_THRESHOLD, default 20000):
+  exact brute force, one matrix-vector product per memmap chunk.
+- Large pools: an IVF index (inverted file: k-means centroids, every row filed under its
+  nearest centroid). A query only scans the rows of its RESUME_SCANNER_NPROBE (default 8)
+  nearest lists. It is trained automatically once the pool crosses the threshold and
+  retrained when the pool has grown 4x; new rows are filed under their nearest centroid
+  on insert, without retraining.
+
+Deleted resumes are tombstoned and skipped; compact() rewrites the files without them.
+A memory-only index keeps the newest RESUME_SCANNER_POOL_MAX_RESUMES (default 5000) resumes.
+With rerank=True the nearest candidates are re-scored with the Strict (TF-IDF) score of
+the Job Description profile and ranked by a weighted mix of both signals.
+
+CLI (needs RESUME_SCANNER_PERSIST=1 for the index to outlive each command):
+    python vector_index.py add resumes/            # extract, embed and index PDFs
+    python vector_index.py search --jd jd.txt -k 10 --rerank
+    python vector_index.py stats | train | compact
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+import numpy as np
+import metrics
+from dataclasses import dataclass
+from cache import content_hash, file_lock, persistent_dir, sizeof
+from jd_profile import get_job_profile, top_k
+
+IVF_THRESHOLD = int(os.environ.get("RESUME_SCANNER_IVF_THRESHOLD", 20_000))
+NPROBE = int(os.environ.get("RESUME_SCANNER_NPROBE", 8))
+# Rows scored per brute-force step: bounds the float32 working set to chunk x dim
+SCAN_CHUNK = 65_536
+# Largest sample the IVF centroids are trained on (k-means cost grows with it)
+TRAIN_SAMPLE = 65_536
+# A memory-only index keeps at most this many resumes; the oldest indexed are removed first
+MAX_MEMORY_RESUMES = int(os.environ.get("RESUME_SCANNER_POOL_MAX_RESUMES", 5000))
+
+def resume_id(text: str) -> str:
+    """Content-addressed id of a (cleaned) CV text: the same resume is only indexed once."""
+    return content_hash(text)[:16]
+
+@dataclass(frozen=True)
+class Match:
+    """
+    One search result:
+    - score: The ranking score (flexible, or the strict/flexible mix when re-ranked).
+    - flexible: Cosine similarity between the JD and CV embeddings.
+    - strict: TF-IDF score against the JD profile (None without re-ranking).
+    """
+    id: str
+    name: str
+    score: float
+    flexible: float
+    strict: float = None
+
+# --- IVF TRAINING ---
+def _nearest(vectors, centroids, chunk: int = 8192) -> np.ndarray:
+    """Index of the most similar centroid for every (unit) vector, in bounded-memory chunks."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        assign[start:start + chunk] = (block @ centroids.T).argmax(axis=1)
+    return assign
+
+def train_centroids(vectors, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine similarity) on unit vectors; returns 'n_lists' unit centroids."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = _nearest(vectors, centroids)
+        # Sum the members of each list with one sort + reduceat instead of a Python loop
+        order = np.argsort(assign, kind="stable")
+        lists, starts = np.unique(assign[order], return_index=True)
+        centroids[lists] = np.add.reduceat(vectors[order], starts, axis=0)
+        # Lists that lost every member restart from a random vector
+        empty = np.setdiff1d(np.arange(n_lists), lists)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids /= np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+    return centroids
+
+class ResumeIndex:
+    """
+    Embeddings of indexed resumes with exact (brute-force) or IVF search.
+    Thread-safe within one process; vectors must come from a single model (see open()).
+    With directory=None, or once the folder cannot be read or written, the index is
+    memory-only (vectors in a growing array, texts in a list) and lasts for the process.
+    A memory-only index holds at most 'max_memory_resumes' resumes: beyond that, the
+    oldest indexed ones are removed (and the storage rewritten once half of it is dead).
+    """
+
+    def __init__(self, directory: str, dim: int, ivf_threshold: int = IVF_THRESHOLD, nprobe: int = NPROBE,
+                 max_memory_resumes: int = MAX_MEMORY_RESUMES):
+        self.directory = directory
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.max_memory_resumes = max_memory_resumes
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._memmap = None
+        self._memory = None       # memory-only storage: [vectors buffer, texts]
+        self._reset()
+        self.queries = 0
+
+        if directory is None:
+            self._use_memory()
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+        except OSError:
+            # Unreadable folder (e.g., read-only container): start empty in memory
+            self._reset()
+            self._use_memory(keep=False)
+
+    @classmethod
+    def open(cls, encoder, directory: str = None, **kwargs):
+        """The index of 'encoder''s model (its model_name, e.g. from EmbeddingStore, names the folder)."""
+        model_name = getattr(encoder, "model_name", type(encoder).__name__)
+        directory = directory or persistent_dir("index", model_name.replace("/", "__"))
+        return cls(directory, encoder.get_sentence_embedding_dimension(), **kwargs)
+
+    # --- STORAGE ---
+    def _reset(self):
+        self._rows = {}           # id -> row of the live copy
+        self._records = []        # row -> (id, name, text offset, text length); memory: (id, name, row, None)
+        self._live = np.zeros(0, dtype=bool)
+        self._centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_rows = 0
+        self._lists = None        # (row order, list start offsets), rebuilt lazily
+        self._records_offset = 0  # bytes of records.jsonl read so far
+        self._records_file = None # inode of that records.jsonl (a compaction creates a new file)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _n_rows(self) -> int:
+        path = self._path("vectors.f32")
+        return os.path.getsize(path) // (self.dim * 4) if os.path.exists(path) else 0
+
+    def _load(self):
+        self._read_records()
+        if os.path.exists(self._path("ivf.npz")):
+            with np.load(self._path("ivf.npz")) as ivf:
+                if ivf["centroids"].shape[1] == self.dim:
+                    self._centroids = ivf["centroids"]
+                    self._assign = ivf["assign"][:len(self._records)]
+                    self._trained_rows = int(ivf["trained_rows"])
+        self._assign_new_rows()
+
+    def _read_records(self):
+        """
+        Adds the rows and deletions written since the last read (by this or another process).
+        When another process compacted the folder meanwhile, the whole index is reloaded.
+        """
+        path = self._path("records.jsonl")
+        stat = os.stat(path) if os.path.exists(path) else None
+        size, inode = (stat.st_size, stat.st_ino) if stat is not None else (0, None)
+        if size < self._records_offset or (self._records_offset and inode != self._records_file):
+            self._reset()
+            self._memmap = None
+            self._load()
+            return
+
+        self._records_file = inode
+        lines = []
+        if size > self._records_offset:
+            with open(path, "rb") as f:
+                f.seek(self._records_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn last line (crash mid-append): ignored, and cut off by the next append
+                        break
+                    self._records_offset += len(line)
+                    lines.append(line)
+
+        # Counted after reading the records: a record is only written once its vector is on disk.
+        # Rows without a record (orphans of an interrupted append) stay None and are never live.
+        n_rows = self._n_rows()
+        if n_rows > len(self._records):
+            self._records.extend([None] * (n_rows - len(self._records)))
+            self._live = np.concatenate([self._live, np.zeros(n_rows - len(self._live), dtype=bool)])
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("deleted"):
+                row = self._rows.pop(record["id"], None)
+                if row is not None:
+                    self._live[row] = False
+            elif record["row"] < n_rows:
+                self._records[record["row"]] = (record["id"], record["name"],
+                                                record["offset"], record["length"])
+                self._rows[record["id"]] = record["row"]
+                self._live[record["row"]] = True
+
+    def _append_records(self, lines):
+        """Appends record lines (call under the write lock, right after _read_records())."""
+        with open(self._path("records.jsonl"), "ab") as f:
+            # A torn last line (crash mid-append) is cut off instead of being completed
+            f.truncate(self._records_offset)
+            f.write("".join(lines).encode("utf-8"))
+            self._records_offset = f.tell()
+            self._records_file = os.fstat(f.fileno()).st_ino
+
+    def _use_memory(self, keep: bool = True):
+        """
+        Switches to memory-only storage, like the other cache tiers do when their folder fails.
+        With keep=True the rows indexed so far are copied over (dropped if they cannot be read).
+        """
+        vectors = np.zeros((max(len(self._records), 64), self.dim), dtype=np.float32)
+        texts = [""] * len(self._records)
+        if keep and self._records and self.directory is not None:
+            try:
+                vectors[:len(self._records)] = self._vectors()
+                # (Orphan rows of an interrupted append have no record and keep an empty text)
+                rows = [row for row, record in enumerate(self._records) if record is not None]
+                for row, text in zip(rows, self._read_texts(rows)):
+                    texts[row] = text
+            except OSError:
+                self._reset()
+                texts = []
+        self._records = [record and (record[0], record[1], row, None) for row, record in enumerate(self._records)]
+        self.directory, self._memmap, self._memory = None, None, [vectors, texts]
+
+    def _read_texts(self, rows):
+        if self._memory is not None:
+            return [self._memory[1][row] for row in rows]
+        with open(self._path("texts.txt"), "rb") as f:
+            result = []
+            for row in rows:
+                _, _, offset, length = self._records[row]
+                f.seek(offset)
+                result.append(f.read(length).decode("utf-8"))
+            return result
+
+    def _vectors(self):
+        """The memmap of all rows, remapped when the file has grown since the last read."""
+        n_rows = len(self._records)
+        if self._memory is not None:
+            return self._memory[0][:n_rows] if n_rows else None
+        if self._memmap is None or self._memmap.shape[0] != n_rows:
+            self._memmap = None if n_rows == 0 else np.memmap(
+                self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+        return self._memmap
+
+    def _assign_new_rows(self):
+        """Files rows added after the last training under their nearest centroid."""
+        n_rows = len(self._records)
+        if self._centroids is None or len(self._assign) >= n_rows:
+            return
+        new = _nearest(self._vectors()[len(self._assign):], self._centroids)
+        self._assign = np.concatenate([self._assign, new])
+        self._lists = None
+
+    # --- WRITES ---
+    def add(self, ids, vectors, names=None, texts=None):
+        """
+        Indexes pre-computed embeddings (normalized here). Ids already indexed are skipped.
+        'texts' (the cleaned CVs) are stored for the TF-IDF re-rank. Returns the ids added.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        names = list(names) if names is not None else list(ids)
+        texts = list(texts) if texts is not None else [""] * len(vectors)
+
+        with self._lock:
+            new, seen = [], set()
+            for i, resume in enumerate(ids):
+                if resume not in self._rows and resume not in seen:
+                    new.append(i)
+                    seen.add(resume)
+            if not new:
+                return []
+
+            if self._memory is None:
+                try:
+                    records = self._append_files([ids[i] for i in new], vectors[new],
+                                                 [str(names[i]) for i in new], [texts[i] for i in new])
+                except OSError:
+                    # Full or read-only disk: keep indexing in memory instead of failing the caller
+                    self._use_memory()
+            if self._memory is not None:
+                records = self._append_memory([ids[i] for i in new], vectors[new],
+                                              [str(names[i]) for i in new], [texts[i] for i in new])
+            for record in records:
+                self._rows[record[0]] = len(self._records)
+                self._records.append(record)
+
+            self._live = np.concatenate([self._live, np.ones(len(records), dtype=bool)])
+            self._assign_new_rows()
+            if self._memory is not None and len(self._rows) > self.max_memory_resumes:
+                self._evict_oldest()
+            if self._needs_training():
+                self.train()
+            return [record[0] for record in records]
+
+    def _evict_oldest(self):
+        """Memory-only index: removes the oldest resumes beyond 'max_memory_resumes' (rows are in insertion order)."""
+        live_rows = np.flatnonzero(self._live)
+        self.evictions += self.remove([self._records[row][0] for row in live_rows[:len(live_rows) - self.max_memory_resumes]])
+        # Removed texts are freed right away, their vectors only by a rewrite
+        if len(self._records) > 2 * self.max_memory_resumes:
+            self.compact()
+
+    def _append_files(self, ids, vectors, names, texts):
+        """
+        Writes new rows to disk and returns their records. Vectors and texts go first, records
+        last, so a record never points at missing data. Runs under the write lock, after picking
+        up what other processes appended (ids they already indexed are skipped).
+        """
+        with file_lock(self._path("write.lock")):
+            self._read_records()
+            new = [i for i, resume in enumerate(ids) if resume not in self._rows]
+            if not new:
+                return []
+            ids, vectors = [ids[i] for i in new], vectors[new]
+            names, texts = [names[i] for i in new], [texts[i] for i in new]
+
+            # New rows start at the end of the file, not at len(records): a torn partial row
+            # (crash mid-append) is cut off first, or every later row would be misaligned
+            row_bytes = self.dim * 4
+            with open(self._path("vectors.f32"), "ab") as f:
+                start = f.tell() // row_bytes
+                if f.tell() != start * row_bytes:
+                    f.truncate(start * row_bytes)
+                f.write(np.ascontiguousarray(vectors).tobytes())
+
+            records, lines = [], []
+            with open(self._path("texts.txt"), "ab") as f:
+                offset = f.tell()
+                for row, (resume, name, text) in enumerate(zip(ids, names, texts), start):
+                    data = text.encode("utf-8")
+                    f.write(data)
+                    records.append((resume, name, offset, len(data)))
+                    lines.append(json.dumps({"id": resume, "row": row, "name": name,
+                                             "offset": offset, "length": len(data)}) + "\n")
+                    offset += len(data)
+            self._append_records(lines)
+            return records
+
+    def _append_memory(self, ids, vectors, names, texts):
+        start = len(self._records)
+        buffer = self._memory[0]
+        if start + len(ids) > len(buffer):
+            # Grow geometrically so appends stay amortized O(rows added)
+            grown = np.zeros((max(2 * len(buffer), start + len(ids)), self.dim), dtype=np.float32)
+            grown[:start] = buffer[:start]
+            buffer = self._memory[0] = grown
+        buffer[start:start + len(ids)] = vectors
+        self._memory[1].extend(texts)
+        return [(resume, name, row, None) for row, (resume, name) in enumerate(zip(ids, names), start)]
+
+    def add_texts(self, texts, encoder, names=None, batch_size: int = 32):
+        """Embeds and indexes cleaned CV texts (skipping ones already indexed). Returns their ids."""
+        ids = [resume_id(text) for text in texts]
+        with self._lock:
+            pending = [i for i, resume in enumerate(ids) if resume not in self._rows]
+        if pending:
+            vectors = encoder.encode([texts[i] for i in pending], batch_size=batch_size, normalize_embeddings=True)
+            self.add([ids[i] for i in pending], vectors,
+                     [names[i] for i in pending] if names is not None else None,
+                     [texts[i] for i in pending])
+        return ids
+
+    def remove(self, ids):
+        """Deletes resumes from the index (tombstones; see compact()). Returns how many were removed."""
+        with self._lock:
+            removed = [resume for resume in ids if resume in self._rows]
+            if not removed:
+                return 0
+            if self._memory is None:
+                try:
+                    with file_lock(self._path("write.lock")):
+                        self._read_records()
+                        removed = [resume for resume in removed if resume in self._rows]
+                        self._append_records([json.dumps({"id": resume, "deleted": True}) + "\n"
+                                              for resume in removed])
+                except OSError:
+                    self._use_memory()
+            for resume in removed:
+                row = self._rows.pop(resume)
+                self._live[row] = False
+                if self._memory is not None:
+                    self._memory[1][row] = ""
+            return len(removed)
+
+    # --- IVF ---
+    def _needs_training(self) -> bool:
+        live = len(self._rows)
+        if live < self.ivf_threshold:
+            return False
+        return self._centroids is None or live > 4 * self._trained_rows
+
+    def train(self, n_lists: int = None, seed: int = 0):
+        """(Re)trains the IVF centroids on the live rows and files every row under its nearest list."""
+        with self._lock:
+            live_rows = np.flatnonzero(self._live)
+            if len(live_rows) == 0:
+                return
+            # ~4 * sqrt(n) lists keeps both the centroid scan and the probed lists small
+            n_lists = min(n_lists or int(4 * np.sqrt(len(live_rows))), len(live_rows))
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(live_rows, min(len(live_rows), TRAIN_SAMPLE), replace=False))
+
+            with metrics.timer("index_train"):
+                vectors = self._vectors()
+                centroids = train_centroids(vectors[sample], n_lists, seed=seed)
+                assign = _nearest(vectors, centroids)
+
+            if self._memory is None:
+                try:
+                    tmp_path = f"{self._path('ivf.npz')}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        np.savez(f, centroids=centroids, assign=assign, trained_rows=np.array(len(live_rows)))
+                    os.replace(tmp_path, self._path("ivf.npz"))
+                except OSError:
+                    # Not saved: the lists are retrained after the next restart
+                    pass
+            self._centroids, self._assign, self._trained_rows = centroids, assign, len(live_rows)
+            self._lists = None
+
+    def _probe_rows(self, query, nprobe: int) -> np.ndarray:
+        """Rows filed under the 'nprobe' centroids closest to the query."""
+        if self._lists is None:
+            order = np.argsort(self._assign, kind="stable")
+            starts = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+            self._lists = (order, starts)
+        order, starts = self._lists
+        probed = top_k(self._centroids @ query, nprobe)
+        return np.sort(np.concatenate([order[starts[c]:starts[c + 1]] for c in probed]))
+
+    # --- SEARCH ---
+    def search_vector(self, query, k: int = 10, nprobe: int = None, exact: bool = False):
+        """
+        The 'k' live resumes most similar to a query embedding: [(id, cosine similarity)].
+        Uses the IVF lists for large pools unless exact=True.
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with self._lock, metrics.timer("index_search"):
+            self.queries += 1
+            vectors = self._vectors()
+            if vectors is None or not self._rows:
+                return []
+
+            if self._centroids is not None and not exact and len(self._rows) >= self.ivf_threshold:
+                rows = self._probe_rows(query, nprobe or self.nprobe)
+                rows = rows[self._live[rows]]
+                scores = vectors[rows] @ query
+                best = top_k(scores, k)
+                return [(self._records[rows[i]][0], float(scores[i])) for i in best]
+
+            # Brute force: exact scores chunk by chunk, keeping each chunk's top k
+            rows, scores = [], []
+            for start in range(0, len(vectors), SCAN_CHUNK):
+                chunk_scores = vectors[start:start + SCAN_CHUNK] @ query
+                chunk_scores[~self._live[start:start + SCAN_CHUNK]] = -np.inf
+                best = top_k(chunk_scores, k)
+                rows.append(best + start)
+                scores.append(chunk_scores[best])
+            rows, scores = np.concatenate(rows), np.concatenate(scores)
+            best = [i for i in top_k(scores, k) if np.isfinite(scores[i])]
+            return [(self._records[rows[i]][0], float(scores[i])) for i in best]
+
+    def search(self, job_description: str, encoder, k: int = 10, rerank: bool = False,
+               strict_weight: float = 0.5, oversample: int = 5, nprobe: int = None):
+        """
+        The 'k' best-matching indexed resumes for a (cleaned) Job Description, best first.
+        With rerank=True, the k * 'oversample' nearest candidates are re-scored with the
+        Strict (TF-IDF) score and ranked by strict_weight * strict + (1 - strict_weight) * flexible.
+        """
+        profile = get_job_profile(job_description)
+        # The JD embedding is computed once and stored with its profile
+        hits = self.search_vector(profile.embedding(encoder), k * oversample if rerank else k, nprobe)
+        if not hits:
+            return []
+
+        if not rerank:
+            return [Match(resume, self.name(resume), score, score) for resume, score in hits]
+
+        strict_scores = profile.score_many(self.texts([resume for resume, _ in hits]))
+        matches = [
+            Match(resume, self.name(resume), float(strict_weight * strict + (1 - strict_weight) * flexible),
+                  flexible, float(strict))
+            for (resume, flexible), strict in zip(hits, strict_scores)
+        ]
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:k]
+
+    # --- LOOKUPS & MAINTENANCE ---
+    def name(self, resume: str) -> str:
+        return self._records[self._rows[resume]][1]
+
+    def texts(self, ids):
+        """Stored CV texts of the given ids (one small read per id)."""
+        with self._lock:
+            return self._read_texts([self._rows[resume] for resume in ids])
+
+    def __contains__(self, resume: str):
+        return resume in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _live_snapshot(self):
+        live_rows = np.flatnonzero(self._live)
+        ids = [self._records[row][0] for row in live_rows]
+        names = [self._records[row][1] for row in live_rows]
+        vectors = np.array(self._vectors()[live_rows]) if len(live_rows) else np.zeros((0, self.dim), np.float32)
+        return ids, vectors, names, self.texts(ids)
+
+    def compact(self):
+        """Rewrites the index without deleted rows (and retrains the IVF lists if it had any)."""
+        with self._lock:
+            had_ivf = self._centroids is not None
+            snapshot = None
+            if self.directory is not None:
+                try:
+                    with file_lock(self._path("write.lock")):
+                        # Rows other processes appended are kept; they reload from the rewritten
+                        # files once they notice the shorter records file (see _read_records())
+                        self._read_records()
+                        snapshot = self._live_snapshot()
+                        self._memmap = None
+                        for name in ("vectors.f32", "texts.txt", "records.jsonl", "ivf.npz"):
+                            if os.path.exists(self._path(name)):
+                                os.remove(self._path(name))
+                except OSError:
+                    if snapshot is None:
+                        snapshot = self._live_snapshot()
+                    self.directory = None
+            else:
+                snapshot = self._live_snapshot()
+            ids, vectors, names, texts = snapshot
+
+            self._memmap = None
+            if self.directory is None:
+                self._memory = [np.zeros((max(len(ids), 64), self.dim), dtype=np.float32), []]
+            self._reset()
+
+            self.add(ids, vectors, names, texts)
+            if had_ivf and self._centroids is None and len(self._rows):
+                self.train()
+
+    def stats(self) -> dict:
+        return {
+            "resumes": len(self._rows),
+            "rows": len(self._records),
+            "deleted": len(self._records) - len(self._rows),
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+            "queries": self.queries,
+            "evictions": self.evictions,
+            # Vectors and texts held in RAM (a persistent index only maps its files)
+            "memory_bytes": self._memory[0].nbytes + sizeof(self._memory[1]) if self._memory is not None else 0,
+            "persistent": self.directory is not None,
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the resume vector index of Resume Scanner Pro.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Extract, embed and index every PDF under the given folders/files.")
+    add.add_argument("sources", nargs="+", help="PDF files or folders (searched recursively).")
+    add.add_argument("--batch-size", type=int, default=64, help="PDFs extracted and embedded per step.")
+
+    search = commands.add_parser("search", help="Find the best-matching indexed resumes for a Job Description.")
+    search.add_argument("--jd", required=True, help="Text file with the Job Description.")
+    search.add_argument("-k", type=int, default=10, help="Number of results.")
+    search.add_argument("--rerank", action="store_true", help="Re-rank candidates with the Strict (TF-IDF) score.")
+    search.add_argument("--strict-weight", type=float, default=0.5, help="Weight of the Strict score when re-ranking.")
+
+    remove = commands.add_parser("remove", help="Delete resumes by id.")
+    remove.add_argument("ids", nargs="+")
+    commands.add_parser("stats", help="Print the index size.")
+    commands.add_parser("train", help="(Re)train the IVF lists now.")
+    commands.add_parser("compact", help="Rewrite the index without deleted resumes.")
+    args = parser.parse_args(argv)
+
+    # Heavy imports only for the commands that need the model
+    import scanner
+    from cli import iter_batches, iter_pdf_paths
+    from extraction import ExtractionError
+    from preprocessing import clean_text
+
+    encoder = scanner.get_encoder()
+    index = ResumeIndex.open(encoder)
+    if index.directory is None:
+        print("Warning: the index is memory-only and is lost when this command exits "
+              "(set RESUME_SCANNER_PERSIST=1 to keep it on disk).", file=sys.stderr)
+
+    if args.command == "add":
+        paths = (path for source in args.sources
+                 for path in (iter_pdf_paths(source) if os.path.isdir(source) else [source]))
+        for batch in iter_batches(paths, args.batch_size):
+            documents = []
+            for path in batch:
+                with open(path, "rb") as f:
+                    documents.append(f.read())
+            readable = [(path, result[0]) for path, result in zip(batch, scanner.extract_many(documents))
+                        if not isinstance(result, ExtractionError) and result[0]]
+            if readable:
+                index.add_texts([text for _, text in readable], encoder, names=[path for path, _ in readable])
+            print(f"Indexed {len(index)} resume(s)...", file=sys.stderr)
+    elif args.command == "search":
+        with open(args.jd, "r", encoding="utf-8") as f:
+            job_description = clean_text(f.read())
+        for rank, match in enumerate(index.search(job_description, encoder, args.k, args.rerank, args.strict_weight), 1):
+            strict = "" if match.strict is None else f"  strict={match.strict:.4f}"
+            print(f"{rank:>3}. {match.score:.4f}  flexible={match.flexible:.4f}{strict}  {match.id}  {match.name}")
+    elif args.command == "remove":
+        print(f"Removed {index.remove(args.ids)} resume(s).")
+    elif args.command == "train":
+        index.train()
+    elif args.command == "compact":
+        index.compact()
+
+    if args.command in ("stats", "train", "compact"):
+        print(json.dumps(index.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()